@@ -1,16 +1,46 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse as BaseJSONResponse, PlainTextResponse
 from pydantic import BaseModel
-import requests
 import spacy
-import pandas as pd
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
 import uuid
-import re
-from difflib import SequenceMatcher
+import time
+import asyncio
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
+from conversation_log import ConversationLog
+from intents import (INTENT_CHECK, INTENT_SUGGEST, classify_intent, contains_profanity, extract_business_concept,
+                     extract_company_name)
+from ollama_client import OllamaUnavailable, astream_generate, generate, preload, router as ollama_router
+from ratelimit import RateLimited, charge, client_keys, create_limiter
+from registry import REGISTRY_PATH, RegistryIndex, load_registry
+from retrieval import KnowledgeIndex, format_passages, load_index
+from singleflight import SingleFlight, fingerprint
+from tracing import PROFILING_ENABLED, annotate, profiler, span, stop_sink, trace
+from suggestions import generate_suggestions
 
-app = FastAPI()
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    print("⚠️ orjson non installé: sérialisation JSON standard")
+
+
+class JSONResponse(BaseJSONResponse):
+    """Réponse JSON sérialisée par orjson (plusieurs fois plus rapide), json sinon."""
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+app = FastAPI(default_response_class=JSONResponse)
 
 
 origins = [
@@ -28,87 +58,356 @@ app.add_middleware(
     allow_headers=["*"],    # Allow all headers
 )
 
-# Dictionnaire global pour stocker l'historique des conversations par session
-conversation_history: Dict[str, List[Dict[str, str]]] = {}
+# Compression négociée (Accept-Encoding) des réponses assez grandes pour en valoir la peine
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
+# Historique des conversations par session (tours, dernière utilisation): cache du journal,
+# du moins récent au plus récent (LRU); une session évincée est rejouée depuis le journal
+conversation_history: "OrderedDict[str, Tuple[List[Dict[str, str]], float]]" = OrderedDict()
+# Historiques gardés en mémoire au plus, et inactivité (s) au-delà de laquelle un historique est évincé
+MAX_SESSION_HISTORIES = 1000
+SESSION_HISTORY_TTL = 1800
+
+# Journal durable des tours, écrit en arrière-plan (aucun fsync sur le chemin de /chat)
+conversation_log = ConversationLog()
+
+@app.on_event("shutdown")
+def close_conversation_log():
+    conversation_log.close()
+    stop_sink()
+
+def cached_history(session_id: str) -> Optional[List[Dict[str, str]]]:
+    entry = conversation_history.get(session_id)
+    if entry is None or time.monotonic() - entry[1] > SESSION_HISTORY_TTL:
+        return None
+    return entry[0]
+
+def remember_history(session_id: str, history: List[Dict[str, str]]):
+    """Garde l'historique de la session et évince les historiques inactifs ou en surnombre."""
+    now = time.monotonic()
+    conversation_history[session_id] = (history, now)
+    conversation_history.move_to_end(session_id)
+    while conversation_history:
+        oldest, (_, used) = next(iter(conversation_history.items()))
+        if len(conversation_history) <= MAX_SESSION_HISTORIES and now - used <= SESSION_HISTORY_TTL:
+            break
+        del conversation_history[oldest]
+
+async def load_session_history(session_id: str):
+    """Met l'historique en cache avant le tour; la relecture du journal tourne hors de la boucle asyncio."""
+    if cached_history(session_id) is None:
+        history = await run_in_threadpool(conversation_log.replay, session_id)
+        # Un tour concurrent a pu le charger entre-temps
+        if cached_history(session_id) is None:
+            remember_history(session_id, history)
+
+def get_session_history(session_id: str) -> List[Dict[str, str]]:
+    """Historique en mémoire; rejoué depuis le journal si la session n'y est pas (éviction, redémarrage)."""
+    history = cached_history(session_id)
+    if history is None:
+        history = conversation_log.replay(session_id)
+    remember_history(session_id, history)
+    return history
 
 def update_history(session_id: str, user_message: str, bot_response: str):
     """Ajoute le message utilisateur et la réponse du bot à l'historique."""
-    if session_id not in conversation_history:
-        conversation_history[session_id] = []
-    conversation_history[session_id].append({
+    get_session_history(session_id).append({
         "user": user_message,
         "assistant": bot_response
     })
+    conversation_log.append(session_id, user_message, bot_response)
 
 def get_history_text(session_id: str) -> str:
-    """Retourne l'historique complet formaté en texte."""
-    if session_id not in conversation_history:
+    """Retourne les derniers tours de l'historique formatés en texte."""
+    history = get_session_history(session_id)
+    if not history:
         return ""
     history_text = ""
-    for entry in conversation_history[session_id]:
+    for entry in history[-MAX_HISTORY_TURNS:]:
         history_text += f"Utilisateur: {entry['user']}\n"
         history_text += f"Assistant: {entry['assistant']}\n\n"
     return history_text.strip()
 
-# Charger le modèle spaCy
-try:
-    nlp = spacy.load('en_core_web_sm')
-except OSError:
-    import subprocess
-    import sys
-    subprocess.run([sys.executable, "-m", "spacy", "download", "en_core_web_sm"], check=True)
-    nlp = spacy.load('en_core_web_sm')
+# Instructions fixes envoyées une seule fois par session (préfixe stable du contexte)
+SYSTEM_PROMPT = (
+    "Tu es un expert en création d'entreprise en Tunisie. "
+    "Fournis des informations précises sur la disponibilité des noms d'entreprise "
+    "et propose 5 suggestions alternatives quand nécessaire. "
+    "Appuie-toi sur les informations de référence fournies avec la question."
+)
+TURN_TEMPLATE = (
+    "Nouvelle question: {prompt}\n\n"
+    "Réponds de manière {style} en 1-2 phrases maximum."
+)
+# Au-delà, le contexte Ollama est abandonné et reconstruit depuis l'historique texte
+MAX_CONTEXT_TOKENS = 3072
+# Tours d'historique texte repris dans le prompt (les passages RNE apportent le reste)
+MAX_HISTORY_TURNS = 4
+# Passages de la base RNE injectés par question
+RETRIEVAL_TOP_K = 2
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
+# Contexte Ollama (modèle, tokens, dernière utilisation) par session, réutilisé pour les tours
+# suivants du même modèle; du moins récent au plus récent (LRU)
+ollama_contexts: "OrderedDict[str, Tuple[str, List[int], float]]" = OrderedDict()
+# Contextes conservés au plus, et inactivité (s) au-delà de laquelle un contexte est abandonné
+MAX_SESSION_CONTEXTS = 1000
+SESSION_CONTEXT_TTL = 1800
+# Tours répondus sans LLM depuis le dernier contexte Ollama de la session
+unsent_turns: Dict[str, List[Dict[str, str]]] = {}
 
-# Chargement du fichier Excel
-try:
-    df = pd.read_excel(r'C:\Users\DeLL\OneDrive\Desktop\cc.xlsx')
-    names_fr = df['NOM_FR'].str.lower().str.strip().tolist()
-    names_ar = df['NOM_AR'].str.strip().tolist()
+def get_ollama_context(session_id: str) -> Tuple[Optional[str], Optional[List[int]]]:
+    """(modèle, tokens) du contexte de la session, ou (None, None) s'il n'existe pas ou a expiré."""
+    entry = ollama_contexts.get(session_id)
+    if entry is None:
+        return None, None
+    if time.monotonic() - entry[2] > SESSION_CONTEXT_TTL:
+        drop_ollama_context(session_id)
+        return None, None
+    return entry[0], entry[1]
+
+def store_ollama_context(session_id: str, model: str, context: List[int]):
+    """Garde le contexte de la session et évince les contextes inactifs ou en surnombre."""
+    now = time.monotonic()
+    ollama_contexts[session_id] = (model, context, now)
+    ollama_contexts.move_to_end(session_id)
+    while ollama_contexts:
+        oldest, (_, _, used) = next(iter(ollama_contexts.items()))
+        if len(ollama_contexts) <= MAX_SESSION_CONTEXTS and now - used <= SESSION_CONTEXT_TTL:
+            break
+        drop_ollama_context(oldest)
+
+def drop_ollama_context(session_id: str):
+    ollama_contexts.pop(session_id, None)
+    # Sans contexte, le prochain prompt repart de l'historique texte qui contient déjà ces tours
+    unsent_turns.pop(session_id, None)
+
+# Ressources chargées au démarrage (vides jusque-là)
+registry = RegistryIndex()
+knowledge = KnowledgeIndex([], None, None)
+nlp = None
+
+# État de chaque composant: pending, ready ou failed
+startup_state: Dict[str, str] = {"registry": "pending", "nlp": "pending", "knowledge": "pending", "llm": "pending"}
+startup_timings: Dict[str, float] = {}
+warm_up_task: Optional[asyncio.Task] = None
+# Ollama injoignable au démarrage: le préchargement est réessayé à cet intervalle (s) jusqu'à réussir
+LLM_WARM_UP_RETRY_SECONDS = 30
+
+def load_registry_component():
+    # Chargement du registre en flux (Excel, CSV ou Parquet), bloc par bloc
+    global registry
+    registry = load_registry(REGISTRY_PATH)
     print("✅ Base de données entreprises chargée")
-except Exception as e:
-    print(f"⚠️ Erreur chargement base de données: {e}")
-    names_fr, names_ar = [], []
 
-def similar(a: str, b: str) -> float:
-    return SequenceMatcher(None, a, b).ratio()
+def load_nlp_component():
+    global nlp
+    try:
+        nlp = spacy.load('en_core_web_sm')
+    except OSError:
+        import subprocess
+        import sys
+        subprocess.run([sys.executable, "-m", "spacy", "download", "en_core_web_sm"], check=True)
+        nlp = spacy.load('en_core_web_sm')
+    print("✅ Modèle spaCy chargé")
+
+def load_knowledge_component():
+    # Base de connaissances RNE vectorisée (index sur disque, recherche top-k)
+    global knowledge
+    knowledge = load_index()
+    print(f"✅ Base de connaissances RNE chargée ({len(knowledge.passages)} passages)")
+
+def warm_up_llm():
+    """Charge les deux modèles dans Ollama avant le premier utilisateur."""
+    ollama_router.check_health()
+    models = dict.fromkeys([ollama_router.small, ollama_router.large])
+    with ThreadPoolExecutor(max_workers=len(models)) as pool:
+        loaded = dict(zip(models, pool.map(preload, models)))
+    if not any(loaded.values()):
+        raise OllamaUnavailable("aucun modèle préchargé")
+    print(f"✅ Modèles préchargés: {', '.join(m for m, hosts in loaded.items() if hosts)}")
+
+async def run_component(name: str, loader):
+    started = time.perf_counter()
+    try:
+        await run_in_threadpool(loader)
+        startup_state[name] = "ready"
+    except Exception as e:
+        print(f"⚠️ Erreur au démarrage ({name}): {e}")
+        startup_state[name] = "failed"
+    startup_timings[name] = round(time.perf_counter() - started, 3)
+
+async def warm_up():
+    """Charge registre, spaCy et base RNE en parallèle et préchauffe le LLM (réessayé en cas d'échec)."""
+    started = time.perf_counter()
+    await asyncio.gather(
+        run_component("registry", load_registry_component),
+        run_component("nlp", load_nlp_component),
+        run_component("knowledge", load_knowledge_component),
+        run_component("llm", warm_up_llm),
+    )
+    print(f"🚀 Service prêt en {time.perf_counter() - started:.2f}s {startup_state}")
+    # Sinon "llm" resterait en échec (et /readyz dégradé) même après le retour d'Ollama
+    while startup_state["llm"] != "ready":
+        await asyncio.sleep(LLM_WARM_UP_RETRY_SECONDS)
+        await run_component("llm", warm_up_llm)
+
+# Sans registre ni base RNE, les réponses seraient fausses ("disponible" pour tout nom):
+# le worker reste hors trafic. spaCy et le LLM sont facultatifs (mode dégradé).
+REQUIRED_COMPONENTS = ("registry", "knowledge")
+
+def is_ready() -> bool:
+    return all(startup_state[name] == "ready" for name in REQUIRED_COMPONENTS)
+
+@app.on_event("startup")
+async def start_lifecycle():
+    # Le serveur accepte les connexions tout de suite (/healthz); /readyz attend la fin du chargement
+    global warm_up_task
+    ollama_router.start_health_checks()
+    warm_up_task = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def stop_lifecycle():
+    if warm_up_task is not None:
+        warm_up_task.cancel()
 
 def check_name_reserved(name: str, threshold: float = 0.85) -> bool:
-    name_lower = name.lower().strip()
-    
-    # Vérification exacte
-    if name_lower in names_fr or name_lower in [x.lower() for x in names_ar]:
-        return True
-    
-    # Vérification par similarité
-    for existing_name in names_fr:
-        if similar(name_lower, existing_name) >= threshold:
-            return True
-    
-    for existing_name in names_ar:
-        if similar(name_lower, existing_name.lower()) >= threshold:
-            return True
-            
-    return False
-
-def extract_company_name(text: str) -> str:
-    patterns = [
-        r"nom [d']?entreprise ['\"]?(.*?)['\"]?",
-        r"vérifier (le )?nom (.*?)( pour|$)",
-        r"nom: (.*?)(\s|$)",
-        r"proposer (le )?nom (.*?)(\s|$)",
-        r"['\"]?(.*?)['\"]? (est|serait) (mon|le) nom"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            for group in reversed(match.groups()):
-                if group and len(group.strip()) > 2:
-                    return group.strip()
-    
-    return text.strip()
+    return registry.is_reserved(name, threshold)
+
+# Regroupement des calculs concurrents identiques (même nom, même prompt)
+flights = SingleFlight()
+
+# Seaux à jetons par session et par IP (partagés entre workers si RATE_LIMIT_DB est défini)
+limiter = create_limiter()
+
+async def charge_shared(keys: List[str], kind: str):
+    """Débite le quota; la version SQLite (verrou entre workers) tourne hors de la boucle asyncio."""
+    if limiter.blocking:
+        await run_in_threadpool(charge, limiter, keys, kind)
+    else:
+        charge(limiter, keys, kind)
+
+async def is_reserved_shared(name: str) -> bool:
+    return await flights.do(("reserved", name.lower().strip()), check_name_reserved, name)
+
+async def suggest_shared(name: str, concept: str, count: int = 3) -> List[str]:
+    return await flights.do(("suggest", name.lower().strip(), concept, count), registry.suggest, name, concept, count)
+
+async def suggest_ranked_shared(name: str, concept: str, count: int = 5, use_llm: bool = True) -> List[str]:
+    # Pool modèles (+ LLM), filtré en un seul passage sur le registre
+    key = ("generate_suggestions", name.lower().strip(), concept, count, use_llm)
+    return await flights.do(key, generate_suggestions, registry, name, concept, count, use_llm)
+
+# Répartition des réponses entre chemins déterministes et LLM
+route_metrics: Dict[str, Dict[str, float]] = {}
+
+def record_route(route: str, started: float):
+    stats = route_metrics.setdefault(route, {"count": 0, "total_ms": 0.0})
+    stats["count"] += 1
+    stats["total_ms"] += (time.perf_counter() - started) * 1000
+    annotate(type=route)
+
+def direct_reply(session_id: str, prompt: str, bot_response: str, route: str, started: float) -> Dict[str, str]:
+    """Répond sans LLM et garde l'historique cohérent pour les tours suivants."""
+    with span("history_update"):
+        update_history(session_id, prompt, bot_response)
+        if session_id in ollama_contexts:
+            # Le contexte Ollama ignore ce tour: il sera rejoué avec la prochaine question au LLM
+            pending = unsent_turns.setdefault(session_id, [])
+            pending.append({"user": prompt, "assistant": bot_response})
+            del pending[:-MAX_HISTORY_TURNS]
+    record_route(route, started)
+    return {"response": bot_response, "type": route}
+
+async def registry_answer(prompt: str, session_id: str, short: bool, started: float,
+                          keys: List[str]) -> Optional[Dict[str, str]]:
+    """Réponse directe depuis le registre quand la demande le permet, sinon None."""
+    # Routage: vérification et suggestions répondues directement depuis le registre
+    with span("extraction") as attrs:
+        intent, name = classify_intent(prompt)
+        attrs["intent"] = intent
+    if intent == INTENT_CHECK:
+        with span("registry_lookup"):
+            reserved = await is_reserved_shared(name)
+        if reserved:
+            with span("suggestions"):
+                suggestions = await suggest_shared(name, extract_business_concept(prompt))
+            if short:
+                bot_response = f"❌ '{name}' est réservé. Suggestions: {', '.join(suggestions)}"
+            else:
+                bot_response = f"❌ Le nom '{name}' est déjà réservé.\nVoici quelques suggestions : {', '.join(suggestions)}"
+        else:
+            bot_response = f"✅ Le nom '{name}' est disponible pour votre entreprise."
+        return direct_reply(session_id, prompt, bot_response, "name_check", started)
+
+    if intent == INTENT_SUGGEST:
+        with span("extraction"):
+            concept = extract_business_concept(prompt)
+        await charge_shared(keys, "suggestions")
+        with span("suggestions", llm=True):
+            suggestions = await suggest_ranked_shared(name, concept)
+        bot_response = f"💡 Suggestions disponibles pour '{name}' : {', '.join(suggestions)}"
+        return direct_reply(session_id, prompt, bot_response, "suggestions", started)
+
+    # Vérification de nom d'entreprise
+    with span("extraction"):
+        extracted_name = extract_company_name(prompt)
+    if extracted_name and extracted_name.strip():
+        with span("registry_lookup"):
+            reserved = await is_reserved_shared(extracted_name)
+        if reserved:
+            record_route("name_check", started)
+            return {
+                "response": f"❌ Le nom '{extracted_name}' est déjà réservé. Veuillez proposer un autre nom.",
+                "type": "name_check"
+            }
+    return None
+
+def build_llm_prompt(session_id: str, prompt: str, style: str) -> Tuple[str, Optional[str], Optional[List[int]], str]:
+    """Construit (prompt, instructions système, contexte Ollama, modèle) pour le tour courant."""
+    # Tokens déjà évalués par Ollama pour cette session: seul le nouveau tour est envoyé
+    context_model, context = get_ollama_context(session_id)
+    if context and len(context) > MAX_CONTEXT_TOKENS:
+        # Contexte trop long pour la fenêtre du modèle: on repart de l'historique texte
+        context = None
+    # La session garde le modèle de son contexte (sauf délestage SLO)
+    model = ollama_router.pick_model(prompt, current=context_model if context else None)
+    if context_model != model:
+        # Le contexte d'un autre modèle n'est pas réutilisable
+        context = None
+
+    turn = TURN_TEMPLATE.format(prompt=prompt, style=style)
+    with span("retrieval") as attrs:
+        passages = knowledge.search(prompt, k=RETRIEVAL_TOP_K)
+        attrs["passages"] = len(passages)
+    if passages:
+        turn = f"Informations de référence:\n{format_passages(passages)}\n\n{turn}"
+    if context:
+        pending = unsent_turns.get(session_id)
+        if pending:
+            exchanges = "\n\n".join(f"Utilisateur: {t['user']}\nAssistant: {t['assistant']}" for t in pending)
+            turn = f"Échanges depuis ta dernière réponse:\n{exchanges}\n\n{turn}"
+        return turn, None, context, model
+    history_text = get_history_text(session_id)
+    prompt_final = f"Historique:\n{history_text}\n\n{turn}" if history_text else turn
+    return prompt_final, SYSTEM_PROMPT, None, model
+
+def complete_llm_turn(session_id: str, prompt: str, result: dict, started: float) -> str:
+    """Enregistre la réponse du LLM (historique, contexte Ollama) et la retourne."""
+    bot_response = (result.get("response") or "Désolé, je n'ai pas de réponse.").strip()
+    if result.get("context"):
+        store_ollama_context(session_id, result["model"], result["context"])
+    # Tours rejoués dans ce prompt (ou présents dans l'historique texte): déjà vus par le modèle
+    unsent_turns.pop(session_id, None)
+    with span("history_update"):
+        update_history(session_id, prompt, bot_response)
+    record_route("ollama_response", started)
+    return bot_response
 
 class ChatRequest(BaseModel):
     prompt: str
@@ -116,74 +415,349 @@ class ChatRequest(BaseModel):
     session_id: str = "default"
     short_response: bool = False
 
+def not_ready_message() -> str:
+    if any(startup_state[name] == "failed" for name in REQUIRED_COMPONENTS):
+        return "Service indisponible: registre ou base RNE non chargés"
+    return "Service en cours de démarrage, réessayez dans quelques secondes"
+
+def not_ready_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"error": not_ready_message()},
+        headers={"Retry-After": "5"}
+    )
+
+def rate_limited_response(error: RateLimited) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(error)},
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
+    if not is_ready():
+        return not_ready_response()
+    keys = client_keys(request.session_id, http_request.client.host if http_request.client else None)
+    with trace("chat", session_id=request.session_id) as current:
+        response = await chat_turn(request, keys)
+        current.attrs["status"] = response.status_code
+        return response
+
+async def chat_turn(request: ChatRequest, keys: List[str]) -> JSONResponse:
     prompt = request.prompt
     session_id = request.session_id
     style = request.style
     short = request.short_response
 
-    # Vérification de nom d'entreprise
-    extracted_name = extract_company_name(prompt)
-    if extracted_name and extracted_name.strip():
-        reserved = check_name_reserved(extracted_name)
-        if reserved:
-            return JSONResponse(content={
-                "response": f"❌ Le nom '{extracted_name}' est déjà réservé. Veuillez proposer un autre nom.",
-                "type": "name_check"
-            })
-
-    # Préparation du contexte historique
-    history_text = get_history_text(session_id)
+    started = time.perf_counter()
 
-    # Construction du prompt final
-    template = (
-        "Tu es un expert en création d'entreprise en Tunisie. "
-        "Fournis des informations précises sur la disponibilité des noms d'entreprise "
-        "et propose 5 suggestions alternatives quand nécessaire.\n\n"
-        "Historique:\n{history_text}\n\n"
-        "Nouvelle question: {prompt}\n\n"
-        "Réponds de manière {style} en 1-2 phrases maximum."
-    )
+    try:
+        await charge_shared(keys, "request")
+        await load_session_history(session_id)
+        reply = await registry_answer(prompt, session_id, short, started, keys)
+        if reply:
+            return JSONResponse(content=reply)
+        await charge_shared(keys, "llm")
+    except RateLimited as e:
+        return rate_limited_response(e)
 
-    prompt_final = template.format(
-        history_text=history_text,
-        prompt=prompt,
-        style=style
-    )
+    prompt_final, system, context, model = build_llm_prompt(session_id, prompt, style)
 
     # Envoi à Ollama
     try:
-        response = requests.post(OLLAMA_URL, json={
-            "model": "llama2:7b",
-            "prompt": prompt_final,
-            "stream": False
-        },)
-        
-        print(f"📡 Ollama status: {response.status_code}")
-        print(f"📄 Ollama response text: {response.text}")
-        
-        if response.status_code != 200:
-            raise Exception(f"Erreur Ollama: {response.status_code}")
-            
-        result = response.json()
-        bot_response = result.get("response", "Désolé, je n'ai pas de réponse.").strip()
-        
-        update_history(session_id, prompt, bot_response)
-        
+        # Même prompt, même style, même historique: une seule génération partagée
+        key = ("llm", fingerprint(model, prompt_final, system, context))
+        with span("llm", model=model):
+            result = await flights.do(key, generate, prompt_final, system, context, model)
+        bot_response = complete_llm_turn(session_id, prompt, result, started)
+
         return JSONResponse(content={
             "response": bot_response,
             "type": "ollama_response"
         })
-        
+
     except Exception as e:
         print(f"⚠️ Exception: {str(e)}")
+        annotate(error=type(e).__name__)
         return JSONResponse(
             status_code=500,
             content={"error": f"Erreur de traitement: {str(e)}"}
         )
 
 
+# Trames en attente d'envoi par connexion: au-delà, la génération attend le client
+WS_SEND_QUEUE = 64
+# Requêtes traitées en parallèle sur une même connexion
+WS_MAX_IN_FLIGHT = 4
+
+async def ws_turn(outbox: asyncio.Queue, session_id: str, request_id: str, message: dict, keys: List[str]):
+    """Traite un message WebSocket et publie ses trames (typing, résultat, tokens, done)."""
+    prompt = message.get("prompt", "")
+    style = message.get("style", "concise")
+    short = bool(message.get("short_response", False))
+    started = time.perf_counter()
+
+    with trace("ws_chat", session_id=session_id):
+        await outbox.put({"id": request_id, "type": "typing"})
+        try:
+            await charge_shared(keys, "request")
+            await load_session_history(session_id)
+            reply = await registry_answer(prompt, session_id, short, started, keys)
+            if reply:
+                await outbox.put({"id": request_id, **reply})
+                await outbox.put({"id": request_id, "type": "done", "response": reply["response"]})
+                return
+            await charge_shared(keys, "llm")
+
+            prompt_final, system, context, model = build_llm_prompt(session_id, prompt, style)
+            parts: List[str] = []
+            result: dict = {}
+            with span("llm", model=model, stream=True):
+                async for chunk in astream_generate(prompt_final, system, context, model, max_buffered=WS_SEND_QUEUE):
+                    if chunk.get("response"):
+                        parts.append(chunk["response"])
+                        await outbox.put({"id": request_id, "type": "token", "content": chunk["response"]})
+                    if chunk.get("done"):
+                        result = chunk
+            result["response"] = "".join(parts)
+            bot_response = complete_llm_turn(session_id, prompt, result, started)
+            await outbox.put({"id": request_id, "type": "done", "response": bot_response})
+        except RateLimited as e:
+            await outbox.put({"id": request_id, "type": "error", "error": str(e), "retry_after": math.ceil(e.retry_after)})
+        except Exception as e:
+            print(f"⚠️ Exception: {str(e)}")
+            annotate(error=type(e).__name__)
+            await outbox.put({"id": request_id, "type": "error", "error": f"Erreur de traitement: {str(e)}"})
+
+@app.websocket("/ws/chat")
+async def ws_chat(websocket: WebSocket):
+    """Canal de chat persistant: la session est liée à la connexion.
+
+    Client -> {"id", "type": "chat", "prompt", "style", "short_response"} ou {"type": "ping"}.
+    Serveur -> trames {"id", "type"} avec type parmi session, typing, name_check,
+    suggestions, token, done, error, pong. Plusieurs requêtes peuvent être en cours,
+    leurs trames sont distinguées par "id".
+    """
+    await websocket.accept()
+    session_id = websocket.query_params.get("session_id") or str(uuid.uuid4())
+    keys = client_keys(session_id, websocket.client.host if websocket.client else None)
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE)
+    turns: Set[asyncio.Task] = set()
+
+    async def writer():
+        try:
+            while True:
+                await websocket.send_json(await outbox.get())
+        except Exception:
+            # Envoi impossible (client parti, trame non sérialisable): on ferme pour que la
+            # boucle de réception sorte et annule les tours qui attendent de la place dans outbox
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+            raise
+
+    writer_task = asyncio.create_task(writer())
+    await outbox.put({"type": "session", "session_id": session_id})
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            # Seul un objet JSON est une requête ([1,2], "x" ou 3 sont refusés sans couper la connexion)
+            if not isinstance(message, dict):
+                await outbox.put({"type": "error", "error": "Message JSON invalide"})
+                continue
+            request_id = str(message.get("id") or uuid.uuid4())
+            if message.get("type") == "ping":
+                await outbox.put({"id": request_id, "type": "pong"})
+                continue
+            if not is_ready():
+                await outbox.put({"id": request_id, "type": "error", "error": not_ready_message(), "retry_after": 5})
+                continue
+            if len(turns) >= WS_MAX_IN_FLIGHT:
+                await outbox.put({"id": request_id, "type": "error", "error": "Trop de requêtes en cours"})
+                continue
+            turn = asyncio.create_task(ws_turn(outbox, session_id, request_id, message, keys))
+            turns.add(turn)
+            turn.add_done_callback(turns.discard)
+    except WebSocketDisconnect:
+        pass
+    except RuntimeError:
+        # Réception après la fermeture décidée par writer()
+        if not writer_task.done():
+            raise
+    finally:
+        if writer_task.done():
+            if not writer_task.cancelled() and writer_task.exception() is not None:
+                print(f"⚠️ WebSocket {session_id}: envoi impossible ({writer_task.exception()!r})")
+        else:
+            writer_task.cancel()
+        for turn in turns:
+            turn.cancel()
+
+
+# Mode vérification / suggestions déterministe (ancien name.py, choix "check" et "suggest")
+class NameCheckRequest(BaseModel):
+    name: str
+    concept: str = "général"
+    suggestions: int = 3
+
+class NameSuggestRequest(BaseModel):
+    name: str
+    concept: str = "général"
+    count: int = 5
+    use_llm: bool = False
+
+class NameChatRequest(ChatRequest):
+    extract_mode: bool = True
+
+async def admit(keys: List[str], kind: str) -> Optional[JSONResponse]:
+    """Réponse de refus (démarrage en cours, quota dépassé), ou None si la requête passe."""
+    if not is_ready():
+        return not_ready_response()
+    try:
+        await charge_shared(keys, kind)
+    except RateLimited as e:
+        return rate_limited_response(e)
+    return None
+
+@app.post("/names/check")
+async def names_check(request: NameCheckRequest, http_request: Request):
+    """Disponibilité d'un nom et, s'il est pris, noms proches disponibles."""
+    keys = client_keys("default", http_request.client.host if http_request.client else None)
+    refused = await admit(keys, "request")
+    if refused:
+        return refused
+    with trace("names_check"):
+        with span("registry_lookup"):
+            reserved = await is_reserved_shared(request.name)
+        suggestions: List[str] = []
+        if reserved and request.suggestions > 0:
+            with span("suggestions"):
+                suggestions = await suggest_shared(request.name, request.concept, request.suggestions)
+        return {"name": request.name, "reserved": reserved, "suggestions": suggestions}
+
+@app.post("/names/suggest")
+async def names_suggest(request: NameSuggestRequest, http_request: Request):
+    """Noms disponibles classés du plus éloigné au plus proche du registre."""
+    keys = client_keys("default", http_request.client.host if http_request.client else None)
+    refused = await admit(keys, "suggestions" if request.use_llm else "request")
+    if refused:
+        return refused
+    with trace("names_suggest", llm=request.use_llm):
+        with span("suggestions"):
+            suggestions = await suggest_ranked_shared(request.name, request.concept, request.count, request.use_llm)
+        return {"name": request.name, "suggestions": suggestions}
+
+# Saisie en cours: recherche par préfixe en mémoire (quelques µs), sans quota pour ne pas gêner la frappe
+AUTOCOMPLETE_MAX = 20
+
+@app.get("/names/autocomplete")
+async def names_autocomplete(q: str = "", limit: int = 10):
+    """Noms enregistrés commençant par `q`; `exact` signale que le nom saisi est déjà pris."""
+    if not is_ready():
+        return not_ready_response()
+    matches = registry.autocomplete(q, max(1, min(limit, AUTOCOMPLETE_MAX)))
+    return {
+        "query": q,
+        "exact": q.lower().strip() in registry.exact,
+        "matches": [{"name": name, "type": type_} for name, type_ in matches],
+    }
+
+@app.post("/names/chat")
+async def names_chat(request: NameChatRequest, http_request: Request):
+    """Chat du mode vérification: le message (ou le nom extrait) est vérifié sans LLM ni historique."""
+    keys = client_keys(request.session_id, http_request.client.host if http_request.client else None)
+    refused = await admit(keys, "request")
+    if refused:
+        return refused
+    with trace("names_chat", session_id=request.session_id):
+        prompt = request.prompt
+        started = time.perf_counter()
+
+        # Vérifier la présence de gros mots
+        with span("profanity"):
+            profane = contains_profanity(prompt)
+        if profane:
+            record_route("profanity", started)
+            return {"response": "⚠️ Votre message contient des propos inappropriés. Veuillez reformuler.", "type": "profanity"}
+
+        with span("extraction"):
+            nom_propose = extract_company_name(prompt) if request.extract_mode else prompt
+            concept = extract_business_concept(prompt) if request.extract_mode else "général"
+        if not nom_propose.strip():
+            record_route("name_check", started)
+            return {"response": "⚠️ Veuillez indiquer le nom à vérifier.", "type": "name_check"}
+        with span("registry_lookup"):
+            reserved = await is_reserved_shared(nom_propose)
+
+        if reserved:
+            with span("suggestions"):
+                suggestions = await suggest_shared(nom_propose, concept)
+            if request.short_response:
+                response = f"❌ '{nom_propose}' est réservé. Suggestions: {', '.join(suggestions)}"
+            else:
+                response = f"❌ Désolé, le nom '{nom_propose}' est déjà réservé.\nVoici quelques suggestions : {', '.join(suggestions)}"
+        else:
+            response = f"✅ felicitation ! Le nom '{nom_propose}' est disponible pour votre entreprise."
+        # Hors de l'historique du chat LLM: ce mode n'a pas de conversation à poursuivre
+        record_route("name_check", started)
+        return {"response": response, "type": "name_check"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Nombre de réponses et latence moyenne par chemin (registre ou LLM)."""
+    return {
+        "routes": {
+            route: {"count": stats["count"], "avg_ms": round(stats["total_ms"] / stats["count"], 2)}
+            for route, stats in route_metrics.items()
+        },
+        "coalescing": flights.stats(),
+        "ollama": ollama_router.stats(),
+    }
+
+
+@app.get("/healthz")
+async def healthz():
+    """Vivacité: le processus répond (même pendant le chargement)."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Disponibilité: 503 tant que le registre et la base RNE ne sont pas chargés (ou en échec).
+
+    Le LLM n'est pas requis: pendant son préchauffage ou s'il est injoignable, le worker
+    sert déjà les routes déterministes et signale `degraded`.
+    """
+    body = {
+        "ready": is_ready(),
+        "degraded": any(startup_state[name] != "ready" for name in startup_state if name not in REQUIRED_COMPONENTS),
+        "components": startup_state,
+        "timings_s": startup_timings,
+    }
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+
+@app.post("/debug/profile/start")
+async def profile_start():
+    """Démarre l'échantillonnage des piles de ce worker (RNE_PROFILING=1)."""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profilage désactivé")
+    profiler.start()
+    return {"profiling": True}
+
+@app.post("/debug/profile/stop", response_class=PlainTextResponse)
+async def profile_stop():
+    """Arrête l'échantillonnage; piles au format folded (flamegraph.pl, speedscope)."""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profilage désactivé")
+    return PlainTextResponse(profiler.stop())
+
+
 # L'interface HTML reste identique (même code que dans votre dernière version)
 # ...
 
@@ -452,11 +1026,70 @@ async def interface():
                 }
             }
 
+            // Canal WebSocket persistant (session liée à la connexion), HTTP en secours
+            const pending = {};
+            let socket = null;
+            let requestCounter = 0;
+            let socketOpened = false;
+            function connectSocket() {
+                const protocol = location.protocol === "https:" ? "wss:" : "ws:";
+                socket = new WebSocket(`${protocol}//${location.host}/ws/chat`);
+                socket.onopen = () => { socketOpened = true; };
+                socket.onmessage = (event) => {
+                    const frame = JSON.parse(event.data);
+                    const message = pending[frame.id];
+                    if (!message) return;
+                    if (frame.type === "token") {
+                        if (!message.started) {
+                            message.element.textContent = "";
+                            message.started = true;
+                        }
+                        message.element.textContent += frame.content;
+                        scrollToBottom();
+                    } else if (frame.type === "done") {
+                        message.element.textContent = frame.response;
+                        delete pending[frame.id];
+                        scrollToBottom();
+                    } else if (frame.type === "error") {
+                        message.element.textContent = "❌ Une erreur est survenue. Veuillez réessayer.";
+                        delete pending[frame.id];
+                    }
+                };
+                socket.onclose = () => {
+                    socket = null;
+                    Object.keys(pending).forEach((id) => {
+                        pending[id].element.textContent = "❌ Connexion perdue. Veuillez réessayer.";
+                        delete pending[id];
+                    });
+                    // Canal refusé dès la connexion (mode vérification, proxy sans WebSocket): HTTP seul
+                    if (socketOpened) setTimeout(connectSocket, 2000);
+                };
+            }
+            if ("WebSocket" in window) {
+                connectSocket();
+            }
+
             // Envoi message au serveur
             async function sendMessage(promptText) {
                 addMessage(promptText, "user");
                 scrollToBottom();
                 promptInput.value = "";
+
+                if (socket && socket.readyState === WebSocket.OPEN) {
+                    const id = String(++requestCounter);
+                    addMessage("⏳ HBA-ASSISTANT réfléchit...", "bot");
+                    const messages = document.querySelectorAll(".message.bot");
+                    pending[id] = { element: messages[messages.length - 1], started: false };
+                    scrollToBottom();
+                    socket.send(JSON.stringify({
+                        id: id,
+                        type: "chat",
+                        prompt: promptText,
+                        style: styleSelect.value
+                    }));
+                    return;
+                }
+
                 addMessage("⏳ HBA-ASSISTANT réfléchit...", "bot");
                 scrollToBottom();
 
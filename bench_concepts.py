@@ -0,0 +1,168 @@
+"""Précision et vitesse de la détection du secteur d'activité (intents.extract_business_concept).
+
+Compare l'index inversé pondéré à l'ancienne recherche par sous-chaînes, sur des
+phrases annotées puis sur une taxonomie synthétique de grande taille. SAMPLES a été
+écrit en même temps que la taxonomie (SECTOR_TERMS) et la flatte forcément; seul
+HELD_OUT, rédigé après coup sans retoucher la taxonomie, mesure la précision réelle:
+
+    python bench_concepts.py --sectors 60 --terms 300
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from intents import DEFAULT_SECTOR, build_sector_index, extract_business_concept
+
+# Ancienne implémentation: premier terme trouvé comme sous-chaîne, secteur par secteur
+LEGACY_KEYWORDS = {
+    "technologie": ["tech", "informatique", "logiciel", "ai", "it", "développement", "numérique"],
+    "restauration": ["restaurant", "café", "bistro", "cuisine", "food", "repas", "nourriture"],
+    "commerce": ["boutique", "shop", "store", "vente", "ecommerce", "marchand", "retail"],
+    "construction": ["bâtiment", "construction", "immobilier", "architecte", "ingénierie", "bâtir"],
+    "santé": ["médical", "santé", "pharmacie", "clinique", "hôpital", "docteur", "médecin"],
+    "éducation": ["école", "éducation", "formation", "université", "apprentissage", "enseignement"],
+    "consulting": ["conseil", "consulting", "service", "expert", "stratégie", "conseiller"],
+    "agriculture": ["agricole", "ferme", "cultiver", "élevage", "culture", "produits naturels"],
+}
+
+
+def legacy_concept(text: str, keywords: Dict[str, List[str]] = LEGACY_KEYWORDS) -> str:
+    text_lower = text.lower()
+    for sector, terms in keywords.items():
+        for term in terms:
+            if term in text_lower:
+                return sector
+    return DEFAULT_SECTOR
+
+
+# Phrases annotées (secteur attendu)
+SAMPLES: List[Tuple[str, str]] = [
+    ("Je veux créer une société de développement de logiciels", "technologie"),
+    ("Startup spécialisée dans le cloud et la data", "technologie"),
+    ("Agence web et marketing digital à Tunis", "technologie"),
+    ("Entreprise de cybersécurité pour les banques", "technologie"),
+    ("Ouvrir deux restaurants et un café à Sousse", "restauration"),
+    ("Service traiteur pour mariages", "restauration"),
+    ("Une pâtisserie traditionnelle à Sfax", "restauration"),
+    ("Pizzeria avec livraison à domicile", "restauration"),
+    ("Boutique de vêtements en ligne", "commerce"),
+    ("Magasin de pièces détachées, vente en gros", "commerce"),
+    ("Plateforme e-commerce d'artisanat", "commerce"),
+    ("Grossiste en produits cosmétiques", "commerce"),
+    ("Entreprise de BTP et travaux publics", "construction"),
+    ("Bureau d'architecture et de génie civil", "construction"),
+    ("Promotion immobilière à Hammamet", "construction"),
+    ("Clinique dentaire privée", "santé"),
+    ("Ouvrir une pharmacie de nuit", "santé"),
+    ("Centre de soins paramédicaux", "santé"),
+    ("Hôpitaux privés et cliniques", "santé"),
+    ("École privée de langues", "éducation"),
+    ("Centre de formation professionnelle", "éducation"),
+    ("Cours de soutien scolaire pour lycéens", "éducation"),
+    ("Crèche et jardin d'enfants", "éducation"),
+    ("Cabinet d'expertise comptable et d'audit", "consulting"),
+    ("Conseil en stratégie pour PME", "consulting"),
+    ("Bureau de consulting RH", "consulting"),
+    ("Exploitation agricole et élevage de bovins", "agriculture"),
+    ("Production d'huile d'olive bio", "agriculture"),
+    ("Ferme de dattes à Tozeur", "agriculture"),
+    ("Vente de semences et engrais", "agriculture"),
+    ("Quel est le capital minimum d'une SARL ?", "général"),
+    ("J'ai besoin d'un nom pour ma société", "général"),
+    ("Visite des locaux avant l'immatriculation", "général"),
+    ("Quels documents pour la constitution ?", "général"),
+    ("Société de transport de marchandises", "général"),
+    ("مطعم في تونس العاصمة", "restauration"),
+    ("شركة برمجيات", "technologie"),
+    ("مدرسة خاصة", "éducation"),
+]
+
+# Phrases rédigées après la taxonomie, sans l'ajuster ensuite: précision hors échantillon
+HELD_OUT: List[Tuple[str, str]] = [
+    ("Je lance une application mobile de réservation de taxis", "technologie"),
+    ("Société d'hébergement de sites internet et de serveurs", "technologie"),
+    ("Intégrateur de solutions ERP pour les industriels", "technologie"),
+    ("Un salon de thé avec terrasse à La Marsa", "restauration"),
+    ("Restauration rapide: sandwichs et plats à emporter", "restauration"),
+    ("Préparation de couscous et de plats tunisiens pour les entreprises", "restauration"),
+    ("Une épicerie fine dans le centre-ville", "commerce"),
+    ("Revendre des téléphones et accessoires", "commerce"),
+    ("Commerce de gros de matériaux électriques", "commerce"),
+    ("Entreprise de plomberie et d'électricité bâtiment", "construction"),
+    ("Rénovation d'appartements et peinture", "construction"),
+    ("Location d'engins de chantier", "construction"),
+    ("Cabinet de kinésithérapie", "santé"),
+    ("Centre d'analyses médicales", "santé"),
+    ("Opticien avec vente de lunettes", "santé"),
+    ("Institut de préparation aux concours", "éducation"),
+    ("Cours particuliers de mathématiques à domicile", "éducation"),
+    ("Organisme de formation continue pour cadres", "éducation"),
+    ("Accompagnement des entreprises à l'export", "consulting"),
+    ("Cabinet de recrutement et de gestion de la paie", "consulting"),
+    ("Bureau d'études en organisation et qualité ISO", "consulting"),
+    ("Apiculture et vente de miel", "agriculture"),
+    ("Culture de tomates sous serre", "agriculture"),
+    ("Pépinière d'arbres fruitiers", "agriculture"),
+    ("Aménagement d'une cour de récréation", "construction"),
+    ("Agence de voyages et billetterie", "général"),
+    ("Salle de sport et fitness", "général"),
+    ("Combien de temps pour obtenir l'extrait du registre ?", "général"),
+    ("Le gérant peut-il être étranger ?", "général"),
+    ("مخبزة في صفاقس", "restauration"),
+    ("شركة مقاولات", "construction"),
+]
+
+
+def accuracy(classify: Callable[[str], str],
+             samples: List[Tuple[str, str]] = SAMPLES) -> Tuple[float, List[Tuple[str, str, str]]]:
+    errors = [(text, expected, classify(text)) for text, expected in samples if classify(text) != expected]
+    return 1 - len(errors) / len(samples), errors
+
+
+def per_call_us(classify: Callable[[str], str], texts: List[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classify(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def synthetic_taxonomy(sectors: int, terms: int, seed: int) -> Dict[str, Dict[str, float]]:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return {
+        f"secteur{s}": {"".join(rng.choice(letters) for _ in range(rng.randint(5, 10))): 1.0 for _ in range(terms)}
+        for s in range(sectors)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai du classement par secteur")
+    parser.add_argument("--sectors", type=int, default=60, help="secteurs de la taxonomie synthétique")
+    parser.add_argument("--terms", type=int, default=300, help="termes par secteur synthétique")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for title, samples in (("phrases de mise au point", SAMPLES), ("phrases hors échantillon", HELD_OUT)):
+        print(f"📋 {title}")
+        for label, classify in (("ancien", legacy_concept), ("index", extract_business_concept)):
+            score, errors = accuracy(classify, samples)
+            print(f"🎯 {label:<7} précision {score:.0%} ({len(samples) - len(errors)}/{len(samples)})")
+            for text, expected, got in errors:
+                print(f"     {text!r}: attendu {expected}, obtenu {got}")
+
+    texts = [text for text, _ in SAMPLES]
+    print(f"⏱️ taxonomie actuelle: ancien {per_call_us(legacy_concept, texts, args.repeat):.1f} µs/appel, "
+          f"index {per_call_us(extract_business_concept, texts, args.repeat):.1f} µs/appel")
+
+    # Taxonomie synthétique: le coût de l'ancien parcours croît avec secteurs x termes
+    taxonomy = synthetic_taxonomy(args.sectors, args.terms, args.seed)
+    keywords = {sector: list(terms) for sector, terms in taxonomy.items()}
+    index = build_sector_index(taxonomy)
+    repeat = max(1, args.repeat // 20)
+    legacy_us = per_call_us(lambda text: legacy_concept(text, keywords), texts, repeat)
+    index_us = per_call_us(lambda text: extract_business_concept(text, index), texts, repeat)
+    print(f"⏱️ {args.sectors} secteurs x {args.terms} termes: ancien {legacy_us:.1f} µs/appel, "
+          f"index {index_us:.1f} µs/appel ({legacy_us / index_us:.0f}x)")
@@ -0,0 +1,98 @@
+"""Coût de sérialisation et de compression des réponses de /chat et /names/*.
+
+Compare, par requête, json (JSONResponse de Starlette) et orjson, puis la taille et
+le temps de compression gzip/brotli des mêmes corps:
+
+    python bench_serialization.py --repeat 2000
+"""
+import argparse
+import gzip
+import random
+import time
+from typing import Callable, Dict, List
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def payloads(seed: int) -> Dict[str, dict]:
+    """Corps représentatifs: réponse de chat, vérification de nom, suggestions, autocomplétion."""
+    rng = random.Random(seed)
+    words = ["société", "dénomination", "registre", "immatriculation", "statuts", "capital", "SARL",
+             "تونس", "الشركة", "gérant", "associés", "dépôt", "RNE", "réservation", "خدمات"]
+
+    def sentence(n: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    names = [f"{sentence(2)} {rng.randrange(100000)}" for _ in range(200)]
+    return {
+        "chat": {"response": sentence(60), "type": "ollama_response"},
+        "name_check": {
+            "name": names[0], "reserved": True,
+            "suggestions": [f"{names[0]} {s}" for s in ("group", "services", "tunisie")],
+        },
+        "suggestions": {"name": names[1], "suggestions": [f"{names[1]} {sentence(1)}" for _ in range(20)]},
+        "autocomplete": {
+            "query": names[2][:5], "exact": False,
+            "matches": [{"name": name, "type": rng.choice(["SARL", "SA", "SUARL"])} for name in names[:20]],
+        },
+        "screening_batch": [
+            {"name": name, "reserved": True,
+             "conflicts": [{"name": rng.choice(names), "score": round(rng.uniform(0.85, 1), 3)} for _ in range(3)],
+             "suggestions": [f"{name} {s}" for s in ("group", "services", "tunisie")]}
+            for name in names
+        ],
+    }
+
+
+def per_call_us(fn: Callable[[], object], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def run(args):
+    encoders: List = [("json", lambda body: JSONResponse(body).body)]
+    if orjson is not None:
+        encoders.append(("orjson", lambda body: orjson.dumps(body, option=orjson.OPT_NON_STR_KEYS)))
+    else:
+        print("⚠️ orjson non installé: seule la sérialisation standard est mesurée")
+
+    print(f"{'réponse':<16}{'octets':>8}" + "".join(f"{name + ' µs':>12}" for name, _ in encoders))
+    bodies = {}
+    for label, body in payloads(args.seed).items():
+        bodies[label] = encoders[0][1](body)
+        timings = [per_call_us(lambda: encode(body), args.repeat) for _, encode in encoders]
+        print(f"{label:<16}{len(bodies[label]):>8}" + "".join(f"{t:>12.1f}" for t in timings))
+
+    compressors = [(f"gzip-{level}", lambda data, level=level: gzip.compress(data, compresslevel=level))
+                   for level in (1, 6, 9)]
+    if brotli is not None:
+        compressors += [(f"br-{quality}", lambda data, quality=quality: brotli.compress(data, quality=quality))
+                        for quality in (4, 11)]
+    print()
+    print(f"{'réponse':<16}" + "".join(f"{name:>18}" for name, _ in compressors) + "   (octets / µs)")
+    for label, data in bodies.items():
+        cells = []
+        for _, compress in compressors:
+            size = len(compress(data))
+            cost = per_call_us(lambda: compress(data), max(1, args.repeat // 10))
+            cells.append(f"{size:>9} / {cost:>6.0f}")
+        print(f"{label:<16}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai sérialisation JSON et compression")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
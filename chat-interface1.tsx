@@ -40,6 +40,88 @@ export function ChatInterfaceHelp({ onBack }: ChatInterfaceProps) {
   // API configuration
 
 const API_ENDPOINT = "http://localhost:8000/chat";
+const WS_ENDPOINT = "ws://localhost:8000/ws/chat";
+const AUTOCOMPLETE_ENDPOINT = "http://localhost:8000/names/autocomplete";
+// Délai après la dernière frappe avant d'interroger le registre
+const AUTOCOMPLETE_DEBOUNCE_MS = 250
+
+  // Registered names matching what is being typed (shown before sending)
+  const [nameMatches, setNameMatches] = useState<{ name: string; type: string }[]>([])
+  const [nameTaken, setNameTaken] = useState(false)
+
+  useEffect(() => {
+    const query = inputValue.trim()
+    // Only short inputs look like a company name; longer ones are questions for the chat
+    if (query.length < 3 || query.split(/\s+/).length > 6) {
+      setNameMatches([])
+      setNameTaken(false)
+      return
+    }
+    const controller = new AbortController()
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(AUTOCOMPLETE_ENDPOINT, {
+          params: { q: query, limit: 5 },
+          signal: controller.signal,
+        })
+        setNameMatches(response.data.matches || [])
+        setNameTaken(Boolean(response.data.exact))
+      } catch {
+        // Cancelled or server unavailable: no hint
+      }
+    }, AUTOCOMPLETE_DEBOUNCE_MS)
+    return () => {
+      clearTimeout(timer)
+      controller.abort()
+    }
+  }, [inputValue])
+
+  // Persistent WebSocket: the server keeps the session bound to the connection
+  const socketRef = useRef<WebSocket | null>(null)
+
+  // Create the bot message on the first frame, then update it in place
+  const upsertBotMessage = (id: string, update: (content: string) => string) => {
+    setMessages((prev) =>
+      prev.some((m) => m.id === id)
+        ? prev.map((m) => (m.id === id ? { ...m, content: update(m.content) } : m))
+        : [...prev, { id, content: update(""), isUser: false, timestamp: new Date() }]
+    )
+  }
+
+  useEffect(() => {
+    let closed = false
+    let retry: ReturnType<typeof setTimeout> | undefined
+
+    const connect = () => {
+      const socket = new WebSocket(WS_ENDPOINT)
+      socket.onmessage = (event) => {
+        const frame = JSON.parse(event.data)
+        if (!frame.id) return
+        if (frame.type === "token") {
+          upsertBotMessage(frame.id, (content) => content + frame.content)
+        } else if (frame.type === "name_check" || frame.type === "suggestions" || frame.type === "done") {
+          upsertBotMessage(frame.id, () => frame.response)
+          if (frame.type === "done") setIsLoading(false)
+        } else if (frame.type === "error") {
+          upsertBotMessage(frame.id, () => `${t("chatbot.error") || "Désolé, une erreur s'est produite."}: ${frame.error}`)
+          setIsLoading(false)
+        }
+      }
+      socket.onclose = () => {
+        socketRef.current = null
+        setIsLoading(false)
+        if (!closed) retry = setTimeout(connect, 2000)
+      }
+      socketRef.current = socket
+    }
+
+    connect()
+    return () => {
+      closed = true
+      if (retry) clearTimeout(retry)
+      socketRef.current?.close()
+    }
+  }, [])
 
 
   // Scroll to bottom
@@ -87,6 +169,19 @@ const API_ENDPOINT = "http://localhost:8000/chat";
     setInputValue("")
     setIsLoading(true)
 
+    const socket = socketRef.current
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({
+        id: (Date.now() + 1).toString(),
+        type: "chat",
+        prompt: inputValue,
+        style: "concise",
+        short_response: false,
+      }))
+      return
+    }
+
+    // Fallback: one HTTP request per message
     try {
       const response = await axios.post(API_ENDPOINT, {
         prompt: inputValue,
@@ -258,6 +353,14 @@ const API_ENDPOINT = "http://localhost:8000/chat";
             )}
           </Button>
         </div>
+        {nameMatches.length > 0 && (
+          <div className="max-w-3xl mx-auto mt-2 text-sm text-gray-600 dark:text-gray-300">
+            {nameTaken
+              ? `❌ ${t("chat.nameTaken") || "Ce nom est déjà enregistré."} `
+              : `⚠️ ${t("chat.similarNames") || "Noms déjà enregistrés :"} `}
+            {nameMatches.map((m) => `${m.name} (${m.type})`).join(", ")}
+          </div>
+        )}
       </div>
     </motion.div>
   )
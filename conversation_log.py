@@ -0,0 +1,297 @@
+import argparse
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+CONVERSATION_LOG_DIR = os.environ.get("RNE_CONVERSATION_LOG_DIR", "conversation_log")
+# Taille à partir de laquelle un nouveau segment est ouvert
+SEGMENT_BYTES = 64 * 1024 * 1024
+# Délai maximal avant l'écriture d'un lot (group commit)
+FLUSH_INTERVAL = 0.05
+MAX_BATCH = 1000
+# Attente avant un nouvel essai d'écriture (disque plein, erreur d'E/S), doublée à chaque échec
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+# Position d'un tour dans le journal: (segment, offset, longueur, horodatage)
+Entry = Tuple[str, int, int, float]
+
+_STOP = object()
+# segment-<pid>-NNNNNN (un écrivain par processus) ou segment-NNNNNN (ancien format, lecture seule)
+_SEGMENT_RE = re.compile(r"^segment-(?:(\d+)-)?(\d{6})\.log$")
+
+
+def _segment_name(writer: int, number: int) -> str:
+    return f"segment-{writer}-{number:06d}"
+
+
+def _segment_path(directory: str, segment: str, ext: str = "log") -> str:
+    return os.path.join(directory, f"{segment}.{ext}")
+
+
+def _append(f: IO[bytes], data: bytes, sync: bool):
+    """Ajoute `data` en entier, ou rien: une écriture partielle est retirée avant de lever l'erreur."""
+    fd = f.fileno()
+    start = os.fstat(fd).st_size
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[f.write(view):]
+        if sync:
+            os.fsync(fd)
+    except OSError:
+        try:
+            os.ftruncate(fd, start)
+        except OSError:
+            pass
+        raise
+
+
+class ConversationLog:
+    """Journal append-only des tours de conversation, écrit en arrière-plan.
+
+    `append` ne fait que déposer le tour dans une file: un thread regroupe les tours
+    en lots, les écrit dans le segment courant et fait un seul fsync par lot. Chaque
+    segment a un fichier .idx (session, offset, longueur, horodatage) pour rejouer une
+    session sans relire tout le journal. Chaque processus (worker) écrit dans ses
+    propres segments: les offsets de l'index restent exacts avec plusieurs workers.
+    """
+
+    def __init__(self, directory: str = CONVERSATION_LOG_DIR, segment_bytes: int = SEGMENT_BYTES,
+                 flush_interval: float = FLUSH_INTERVAL, max_batch: int = MAX_BATCH):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        os.makedirs(directory, exist_ok=True)
+
+        self._index: Dict[str, List[Entry]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = os.getpid()
+        self._number = self._recover()
+        self._segment = _segment_name(self._writer, self._number)
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="conversation-log", daemon=True)
+        self._thread.start()
+
+    # --- Reprise au démarrage -------------------------------------------------
+
+    def _segments(self) -> List[Tuple[str, Optional[int], int]]:
+        """Segments présents, tous écrivains confondus: (nom, pid ou None, numéro)."""
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, "segment-*.log")):
+            match = _SEGMENT_RE.match(os.path.basename(path))
+            if match:
+                writer = int(match.group(1)) if match.group(1) else None
+                segments.append((os.path.basename(path)[:-4], writer, int(match.group(2))))
+        return sorted(segments, key=lambda s: (s[1] or 0, s[2]))
+
+    def _recover(self) -> int:
+        """Recharge l'index de tous les segments et retourne le numéro du segment de ce processus."""
+        current = 1
+        for segment, writer, number in self._segments():
+            if writer == self._writer:
+                current = max(current, number)
+            indexed_to = 0
+            idx_path = _segment_path(self.directory, segment, "idx")
+            if os.path.exists(idx_path):
+                with open(idx_path, encoding="utf-8") as f:
+                    for line in f:
+                        # Ligne incomplète: un autre worker est peut-être en train de l'écrire
+                        parts = line.rstrip("\n").split("\t")
+                        if not line.endswith("\n") or len(parts) not in (3, 4):
+                            continue
+                        try:
+                            session_id, offset, length = parts[0], int(parts[1]), int(parts[2])
+                            ts = float(parts[3]) if len(parts) == 4 else 0.0
+                        except ValueError:
+                            continue
+                        self._index.setdefault(session_id, []).append((segment, offset, length, ts))
+                        indexed_to = max(indexed_to, offset + length)
+            # Tours écrits mais absents de l'index (arrêt brutal entre les deux écritures)
+            with open(_segment_path(self.directory, segment), "rb") as f:
+                f.seek(indexed_to)
+                offset = indexed_to
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                        session_id, ts = record["session_id"], float(record.get("ts", 0.0))
+                    except (ValueError, KeyError, TypeError):
+                        offset += len(line)
+                        continue
+                    self._index.setdefault(session_id, []).append((segment, offset, len(line), ts))
+                    offset += len(line)
+        # Une session servie par plusieurs workers a ses tours dans plusieurs segments
+        for entries in self._index.values():
+            entries.sort(key=lambda entry: entry[3])
+        return current
+
+    # --- Écriture ---------------------------------------------------------------
+
+    def append(self, session_id: str, user_message: str, bot_response: str):
+        """Ajoute un tour au journal sans attendre le disque."""
+        self._queue.put({
+            "session_id": session_id,
+            "ts": time.time(),
+            "user": user_message,
+            "assistant": bot_response,
+        })
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            for item in [first] + self._drain():
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write_with_retry(batch, attempts=3 if stopping else None)
+
+    def _write_with_retry(self, batch: List[dict], attempts: Optional[int] = None):
+        """Écrit le lot; en cas d'erreur, réessaie (les tours restent en mémoire, rien n'est perdu).
+
+        Si seul le .idx a échoué, les tours déjà dans le segment ne sont pas réécrits.
+        """
+        delay = RETRY_DELAY
+        entries: Optional[List[Tuple[str, int, int, float]]] = None
+        while True:
+            try:
+                if entries is None:
+                    entries = self._write_log(batch)
+                self._write_index(entries)
+                return
+            except Exception as e:
+                if attempts is not None:
+                    attempts -= 1
+                    if attempts <= 0:
+                        print(f"⚠️ Journal des conversations: {len(batch)} tours non écrits ({e})")
+                        return
+                print(f"⚠️ Journal des conversations: écriture impossible ({e}), nouvel essai dans {delay:.0f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def _drain(self) -> list:
+        items = []
+        while len(items) < self.max_batch:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _write_log(self, batch: List[dict]) -> List[Tuple[str, int, int, float]]:
+        """Écrit le lot dans le segment (un seul fsync) et retourne ses entrées d'index."""
+        if os.fstat(self._log.fileno()).st_size >= self.segment_bytes:
+            self._roll()
+        lines, entries = [], []
+        # Fichier ouvert en ajout: le lot commence à la fin réelle du fichier, pas à tell()
+        offset = os.fstat(self._log.fileno()).st_size
+        for record in batch:
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            lines.append(line)
+            entries.append((record["session_id"], offset, len(line), record["ts"]))
+            offset += len(line)
+
+        # Group commit: une écriture et un fsync pour tout le lot
+        _append(self._log, b"".join(lines), sync=True)
+        with self._lock:
+            for session_id, offset, length, ts in entries:
+                self._index.setdefault(session_id, []).append((self._segment, offset, length, ts))
+        return entries
+
+    def _write_index(self, entries: List[Tuple[str, int, int, float]]):
+        lines = "".join(f"{s}\t{o}\t{n}\t{ts:.6f}\n" for s, o, n, ts in entries)
+        _append(self._idx, lines.encode("utf-8"), sync=False)
+
+    def _open_segment(self):
+        # Sans tampon: après une écriture échouée, rien ne reste en attente d'être vidé plus tard
+        self._log: IO[bytes] = open(_segment_path(self.directory, self._segment), "ab", buffering=0)
+        self._idx: IO[bytes] = open(_segment_path(self.directory, self._segment, "idx"), "ab", buffering=0)
+
+    def _roll(self):
+        self._log.close()
+        self._idx.close()
+        self._number += 1
+        self._segment = _segment_name(self._writer, self._number)
+        self._open_segment()
+
+    def close(self):
+        """Écrit les tours en attente puis ferme le journal."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._log.close()
+        self._idx.close()
+
+    # --- Lecture ----------------------------------------------------------------
+
+    def replay(self, session_id: str) -> List[Dict[str, str]]:
+        """Relit les tours d'une session (seulement ses enregistrements, via l'index)."""
+        with self._lock:
+            entries = list(self._index.get(session_id, []))
+        turns = []
+        handles: Dict[str, IO[bytes]] = {}
+        try:
+            for segment, offset, length, _ in entries:
+                f = handles.get(segment)
+                if f is None:
+                    f = handles[segment] = open(_segment_path(self.directory, segment), "rb")
+                f.seek(offset)
+                try:
+                    record = json.loads(f.read(length))
+                    turns.append({"user": record["user"], "assistant": record["assistant"]})
+                except (ValueError, KeyError) as e:
+                    # Entrée illisible: la session reprend sans ce tour plutôt que d'échouer
+                    print(f"⚠️ Journal des conversations: tour illisible ({segment}@{offset}): {e}")
+        finally:
+            for f in handles.values():
+                f.close()
+        return turns
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def iter_records(self) -> Iterator[bytes]:
+        """Parcourt tout le journal, segment par segment, en lignes JSON brutes."""
+        for segment, _, _ in self._segments():
+            with open(_segment_path(self.directory, segment), "rb") as f:
+                for line in f:
+                    if line.endswith(b"\n"):
+                        yield line
+
+    def export(self, out: IO[bytes], session_id: Optional[str] = None) -> int:
+        """Exporte le journal (ou une session) en JSONL pour l'analyse; retourne le nombre de tours."""
+        count = 0
+        for line in self.iter_records():
+            if session_id is None or json.loads(line)["session_id"] == session_id:
+                out.write(line)
+                count += 1
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export du journal des conversations en JSONL")
+    parser.add_argument("output", help="fichier JSONL de sortie")
+    parser.add_argument("--dir", default=CONVERSATION_LOG_DIR, help="répertoire du journal")
+    parser.add_argument("--session", help="n'exporter qu'une session")
+    args = parser.parse_args()
+
+    log = ConversationLog(args.dir)
+    with open(args.output, "wb") as out:
+        exported = log.export(out, args.session)
+    log.close()
+    print(f"✅ {exported} tours exportés vers {args.output}")
@@ -0,0 +1,267 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# Intentions reconnues sans appel au LLM
+INTENT_CHECK = "check"
+INTENT_SUGGEST = "suggest"
+INTENT_OPEN = "open"
+
+NAME_PATTERNS = [
+    r"nom [d']?entreprise ['\"]?(.*?)['\"]?",
+    r"vérifier (le )?nom (.*?)(?: pour|$)",
+    r"nom: (.*?)(?:\s|$)",
+    r"proposer (le )?nom (.*?)(?:\s|$)",
+    r"['\"]?(.*?)['\"]? (?:est|serait) (?:mon|le) nom"
+]
+
+# Nom clairement désigné (premier groupe): entre guillemets, ou après "le nom" dans
+# "le nom X est-il disponible ?". Le sujet d'une phrase quelconque ("Le formulaire ... est-il
+# disponible ?") n'est pas un nom: la question part au LLM.
+# Seuls les guillemets droits ou français délimitent un nom: l'apostrophe est partout en français.
+AVAILABILITY_PATTERNS = [
+    r"[\"«]\s*(.+?)\s*[\"»]",
+    r"(?<!\w)(?:le|du|ce) nom\s+(.+?)\s+(?:est|serait)[- ]?(?:il|elle)?\s+(?:disponible|libre|réservé|pris)",
+    r"(?<!\w)the name\s+(.+?)\s+(?:is\s+)?(?:available|taken)",
+]
+
+CHECK_KEYWORDS = ["disponible", "disponibilité", "réservé", "libre", "vérifier", "vérifie", "available", "taken", "متاح"]
+SUGGEST_KEYWORDS = ["suggestion", "suggestions", "suggère", "suggérer", "suggest", "idée de nom", "idées de nom",
+                    "propose-moi", "proposez-moi", "proposer des noms", "alternative", "alternatives", "اقترح"]
+
+
+def _keyword_re(keywords: List[str]):
+    # Mots entiers: "libre" ne doit pas répondre à "équilibre"
+    return re.compile(r"(?<!\w)(?:" + "|".join(re.escape(k) for k in keywords) + r")(?!\w)", re.IGNORECASE)
+
+
+CHECK_RE = _keyword_re(CHECK_KEYWORDS)
+SUGGEST_RE = _keyword_re(SUGGEST_KEYWORDS)
+
+# Mots qui ne forment pas un nom d'entreprise à eux seuls: articles, pronoms, mots
+# interrogatifs et vocabulaire des démarches (un "nom" qui n'en contient que part au LLM)
+NAME_STOPWORDS = {
+    "le", "la", "les", "l", "un", "une", "des", "de", "du", "d", "et", "ou", "à", "au", "aux", "en",
+    "mon", "ma", "mes", "ton", "ta", "tes", "son", "sa", "ses", "notre", "votre", "nos", "vos", "leur",
+    "je", "tu", "il", "elle", "on", "nous", "vous", "ils", "elles", "ce", "c", "ça", "cela", "qu", "que",
+    "qui", "quoi", "quel", "quelle", "est", "sont", "comment", "pourquoi", "quand", "où", "combien",
+    "possible", "peut", "peux", "faut", "dois", "veux", "si", "pour", "avec", "sur", "dans", "par", "pas",
+    "rne", "registre", "société", "entreprise", "sarl", "suarl", "sa", "capital", "siège", "adresse",
+    "bureau", "guichet", "service", "site", "statuts", "dossier", "immatriculation", "the", "is", "it",
+    # Jamais un nom à eux seuls ("le nom", "nom de famille", "le formulaire", "the office")
+    "nom", "noms", "prénom", "famille", "formulaire", "demande", "document", "documents", "extrait",
+    "attestation", "réservation", "name", "office", "today",
+}
+# Fragments de proposition: une vraie dénomination n'en contient pas
+CLAUSE_MARKERS = re.compile(r"[?,;:!]|(?<!\w)(?:qu'|c'|est-ce|n'|j')", re.IGNORECASE)
+
+
+def plausible_name(name: str) -> bool:
+    """Faux si le "nom" extrait ressemble à un morceau de phrase plutôt qu'à une dénomination."""
+    if CLAUSE_MARKERS.search(name):
+        return False
+    words = re.findall(r"\w+", name.lower())
+    content = [w for w in words if w not in NAME_STOPWORDS]
+    return bool(content) and len(content) * 2 >= len(words)
+
+
+PROFANITY_WORDS = ["naco", "fuck", "shit", "merde", "pute", "con", "connard", "asshole", "idiot", "stupid", "bastard","nik","potano","zebi", "nik", "kelb", "sharmuta", "bent", "benti", "bnit", "3ayz", "taban", "haywan", "tiz", "kos", "kosomak", "3irs","زب", "نيك", "كلب", "شرموطة", "بنت", "بنتي", "بنيت", "عيز", "تعبان", "حيوان", "طيز", "كس", "كس أمك", "عرص"]
+# Une seule expression pour toute la liste (les mots longs d'abord)
+PROFANITY_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in sorted(set(PROFANITY_WORDS), key=len, reverse=True)) + r")\b"
+)
+
+
+def contains_profanity(text: str) -> bool:
+    return PROFANITY_RE.search(text.lower()) is not None
+
+
+def match_company_name(text: str) -> Optional[str]:
+    """Retourne le nom trouvé par un des motifs explicites, sinon None."""
+    for pattern in NAME_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            for group in reversed(match.groups()):
+                if group and len(group.strip()) > 2:
+                    return group.strip()
+    return None
+
+
+def extract_company_name(text: str) -> str:
+    return match_company_name(text) or text.strip()
+
+
+# Secteurs et termes pondérés (1.0 = indice net, 0.5 = indice faible ou ambigu)
+SECTOR_TERMS: Dict[str, Dict[str, float]] = {
+    "technologie": {
+        "tech": 1.0, "technologie": 1.0, "informatique": 1.0, "logiciel": 1.0, "développement": 0.5,
+        "numérique": 1.0, "digital": 1.0, "web": 1.0, "application": 0.5, "software": 1.0, "startup": 0.5,
+        "intelligence artificielle": 1.5, "cloud": 1.0, "data": 1.0, "cybersécurité": 1.5, "tic": 1.0,
+        "تكنولوجيا": 1.0, "برمجيات": 1.0,
+    },
+    "restauration": {
+        "restaurant": 1.5, "café": 1.0, "bistro": 1.0, "cuisine": 1.0, "food": 1.0, "repas": 1.0,
+        "nourriture": 1.0, "traiteur": 1.5, "pâtisserie": 1.5, "boulangerie": 1.5, "pizzeria": 1.5,
+        "fast food": 1.5, "snack": 1.0, "مطعم": 1.5, "مقهى": 1.0,
+    },
+    "commerce": {
+        "boutique": 1.0, "shop": 1.0, "store": 1.0, "vente": 1.0, "ecommerce": 1.5, "e-commerce": 1.5,
+        "marchand": 1.0, "retail": 1.0, "magasin": 1.0, "import": 0.5, "export": 0.5, "négoce": 1.0,
+        "distribution": 0.5, "grossiste": 1.0, "تجارة": 1.0, "متجر": 1.0,
+    },
+    "construction": {
+        "bâtiment": 1.5, "construction": 1.5, "immobilier": 1.0, "architecte": 1.0, "architecture": 1.0,
+        "ingénierie": 0.5, "bâtir": 1.0, "travaux": 1.0, "btp": 1.5, "génie civil": 1.5, "promotion immobilière": 1.5,
+        "بناء": 1.5, "عقارات": 1.0,
+    },
+    "santé": {
+        "médical": 1.0, "santé": 1.0, "pharmacie": 1.5, "clinique": 1.5, "hôpital": 1.5, "docteur": 1.0,
+        "médecin": 1.0, "dentaire": 1.5, "laboratoire": 0.5, "paramédical": 1.5, "soins": 1.0,
+        "صحة": 1.0, "مصحة": 1.5, "صيدلية": 1.5,
+    },
+    "éducation": {
+        "école": 1.5, "éducation": 1.5, "formation": 1.0, "université": 1.5, "apprentissage": 1.0,
+        "enseignement": 1.5, "cours": 0.5, "académie": 1.0, "crèche": 1.0, "soutien scolaire": 1.5,
+        "تعليم": 1.5, "مدرسة": 1.5, "تكوين": 1.0,
+    },
+    "consulting": {
+        "conseil": 1.0, "consulting": 1.5, "service": 0.5, "expert": 0.5, "stratégie": 1.0, "conseiller": 1.0,
+        "audit": 1.0, "comptable": 1.0, "expertise comptable": 1.5, "accompagnement": 0.5, "استشارات": 1.5,
+    },
+    "agriculture": {
+        "agricole": 1.5, "ferme": 1.0, "cultiver": 1.0, "élevage": 1.5, "culture": 0.5, "produits naturels": 1.0,
+        "agriculture": 1.5, "olive": 1.0, "huile d'olive": 1.5, "dattes": 1.0, "bio": 0.5, "semences": 1.0,
+        "فلاحة": 1.5, "زيتون": 1.0,
+    },
+}
+DEFAULT_SECTOR = "général"
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+# Mots terminés par s/x au singulier (après _normalize): "cours" ne doit pas devenir "cour"
+INVARIABLE_WORDS = {
+    "cours", "concours", "parcours", "discours", "secours", "recours", "temps", "corps", "pays",
+    "prix", "choix", "voix", "croix", "mois", "fois", "bois", "repas", "bras", "dos", "poids",
+    "frais", "tapis", "gaz", "bus", "virus", "campus", "process", "business", "fitness",
+}
+
+
+def _stem(token: str) -> str:
+    if token in INVARIABLE_WORDS:
+        return token
+    # Pluriels: restaurants -> restaurant, réseaux -> réseau, hôpitaux -> hôpital
+    if len(token) > 4 and token.endswith("aux") and not token.endswith("eaux"):
+        return token[:-3] + "al"
+    if len(token) > 3 and token[-1] in "sx" and token[-2] != token[-1]:
+        return token[:-1]
+    return token
+
+
+def _tokens(text: str) -> List[str]:
+    return [_stem(token) for token in re.findall(r"\w+", _normalize(text))]
+
+
+def build_sector_index(taxonomy: Dict[str, Dict[str, float]]):
+    """Index inversé terme -> [(secteur, poids)]; les expressions sont rangées par premier mot."""
+    terms: Dict[str, List[Tuple[str, float]]] = {}
+    phrases: Dict[str, List[Tuple[Tuple[str, ...], str, float]]] = {}
+    for sector, weighted in taxonomy.items():
+        for term, weight in weighted.items():
+            tokens = tuple(_tokens(term))
+            if len(tokens) == 1:
+                terms.setdefault(tokens[0], []).append((sector, weight))
+            elif tokens:
+                phrases.setdefault(tokens[0], []).append((tokens, sector, weight))
+    return terms, phrases
+
+
+SECTOR_INDEX = build_sector_index(SECTOR_TERMS)
+# Ordre de départage en cas d'égalité: celui de la taxonomie
+_SECTOR_RANK = {sector: rank for rank, sector in enumerate(SECTOR_TERMS)}
+
+
+def score_sectors(text: str, index=SECTOR_INDEX) -> Dict[str, float]:
+    """Score de chaque secteur cité, en un seul passage sur les mots du texte."""
+    terms, phrases = index
+    tokens = _tokens(text)
+    scores: Dict[str, float] = {}
+    for i, token in enumerate(tokens):
+        for sector, weight in terms.get(token, ()):
+            scores[sector] = scores.get(sector, 0.0) + weight
+        for phrase, sector, weight in phrases.get(token, ()):
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                scores[sector] = scores.get(sector, 0.0) + weight
+    return scores
+
+
+def extract_business_concept(text: str, index=SECTOR_INDEX) -> str:
+    """Secteur d'activité le mieux noté (mots entiers, pluriels compris), sinon "général"."""
+    scores = score_sectors(text, index)
+    if not scores:
+        return DEFAULT_SECTOR
+    return max(scores, key=lambda sector: (scores[sector], -_SECTOR_RANK.get(sector, 0)))
+
+
+def _availability_name(text: str) -> Optional[str]:
+    for pattern in AVAILABILITY_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match and len(match.group(1).strip()) > 2:
+            return match.group(1).strip(" ?!.")
+    return None
+
+
+def classify_intent(text: str) -> Tuple[str, Optional[str]]:
+    """Classe la demande (vérification, suggestion ou question ouverte) et extrait le nom visé.
+
+    Classification par mots-clés et expressions régulières: quelques microsecondes,
+    sans modèle. Une demande sans nom identifiable est toujours considérée ouverte.
+    """
+    explicit = match_company_name(text)
+    name = explicit or _availability_name(text)
+    if not name or not plausible_name(name):
+        return INTENT_OPEN, None
+    if SUGGEST_RE.search(text):
+        return INTENT_SUGGEST, name
+    if explicit or CHECK_RE.search(text):
+        return INTENT_CHECK, name
+    return INTENT_OPEN, None
+
+
+# Exemples annotés: les questions ouvertes doivent aller au LLM, pas au registre
+INTENT_SAMPLES: List[Tuple[str, str]] = [
+    ("Qu'est-ce qu'une SARL et est-elle libre de choisir son capital ?", INTENT_OPEN),
+    ("Je veux vérifier l'adresse de mon siège, c'est possible ?", INTENT_OPEN),
+    ("Le RNE est il disponible le samedi ?", INTENT_OPEN),
+    ("Quels documents faut-il fournir pour l'immatriculation ?", INTENT_OPEN),
+    ("Comment trouver l'équilibre entre capital et apports ?", INTENT_OPEN),
+    ("L'extrait du registre est-il disponible en ligne ?", INTENT_OPEN),
+    ("Est-ce que le guichet unique est ouvert aujourd'hui ?", INTENT_OPEN),
+    ("Quelle est la différence entre une SARL et une SUARL ?", INTENT_OPEN),
+    ("Mon dossier est-il réservé ou en attente ?", INTENT_OPEN),
+    ("C'est libre d'accès, le site du RNE ?", INTENT_OPEN),
+    ("Le formulaire de réservation est-il disponible en arabe ?", INTENT_OPEN),
+    ("Mon nom de famille est-il réservé aux sociétés ?", INTENT_OPEN),
+    ("Le nom est-il disponible ?", INTENT_OPEN),
+    ("is the office available today", INTENT_OPEN),
+    # Sujet sans guillemets ni "le nom": rien ne le distingue d'une question ouverte
+    ("Est-ce que Alpha Tech est disponible ?", INTENT_OPEN),
+    ('Est-ce que "Alpha Tech" est disponible ?', INTENT_CHECK),
+    ("Le nom Zitouna Digital est-il libre ?", INTENT_CHECK),
+    ("«Carthage Food» est-il réservé ?", INTENT_CHECK),
+    ('Donne-moi des suggestions pour "Carthage Food"', INTENT_SUGGEST),
+]
+
+
+if __name__ == "__main__":
+    import sys
+
+    failures = [(text, expected, classify_intent(text)) for text, expected in INTENT_SAMPLES
+                if classify_intent(text)[0] != expected]
+    for text, expected, got in failures:
+        print(f"❌ {text!r}: attendu {expected}, obtenu {got}")
+    print(f"{'✅' if not failures else '⚠️'} {len(INTENT_SAMPLES) - len(failures)}/{len(INTENT_SAMPLES)} intentions correctes")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,92 @@
+"""Générateur de charge pour /chat: débit et latences (p50/p95/p99) par type de réponse.
+
+À utiliser avec le simulateur pour des mesures reproductibles:
+
+    python ollama_sim.py --quiet --parallel 2 &
+    uvicorn app:app --port 8000 &
+    python loadtest.py --concurrency 16 --requests 400
+"""
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import requests
+
+DEFAULT_PROMPTS = [
+    "Est-ce que Alpha Tech est disponible ?",
+    "Le nom Zitouna Digital est-il libre ?",
+    "Donne-moi des suggestions pour \"Carthage Food\"",
+    "Quelles sont les étapes pour créer une SARL en Tunisie avec deux associés ?",
+    "Quels documents faut-il fournir pour immatriculer une société anonyme au registre ?",
+    "Quelle différence entre une SUARL et une entreprise individuelle pour un créateur seul ?",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run(args) -> Dict[str, List[float]]:
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        with open(args.prompts, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+    rng = random.Random(args.seed)
+    # Plan de charge tiré à l'avance: même graine, même séquence de requêtes
+    plan = [(rng.choice(prompts), f"load-{rng.randrange(args.sessions)}") for _ in range(args.requests)]
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    lock = threading.Lock()
+    cursor = iter(plan)
+
+    def worker():
+        http = requests.Session()
+        while True:
+            with lock:
+                item = next(cursor, None)
+            if item is None:
+                return
+            prompt, session_id = item
+            started = time.perf_counter()
+            try:
+                response = http.post(args.url, json={"prompt": prompt, "session_id": session_id}, timeout=args.timeout)
+                kind = response.json().get("type", "error") if response.status_code == 200 else f"http_{response.status_code}"
+            except (requests.RequestException, ValueError):
+                kind = "error"
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[kind].append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"📊 {total} requêtes en {duration:.2f}s, {total / duration:.1f} req/s, concurrence {args.concurrency}")
+    print(f"{'type':<18}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind, values in sorted(latencies.items()) + [("total", [v for vs in latencies.values() for v in vs])]:
+        print(f"{kind:<18}{len(values):>6}" + "".join(
+            f"{percentile(values, p) * 1000:>10.1f}" for p in (50, 95, 99, 100)))
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge de l'endpoint /chat")
+    parser.add_argument("--url", default="http://localhost:8000/chat")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=20, help="nombre de sessions simulées")
+    parser.add_argument("--prompts", help="fichier texte, un prompt par ligne")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
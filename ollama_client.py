@@ -0,0 +1,327 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+import requests
+from starlette.concurrency import run_in_threadpool
+
+from tracing import annotate
+
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/generate")
+# Instances Ollama disponibles (séparées par des virgules)
+OLLAMA_HOSTS = [
+    host.strip().rstrip("/")
+    for host in os.environ.get("OLLAMA_HOSTS", OLLAMA_URL.rsplit("/api/", 1)[0]).split(",")
+    if host.strip()
+]
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama2:7b")
+# Petit modèle rapide pour les questions courtes, les tâches simples et le délestage
+OLLAMA_SMALL_MODEL = os.environ.get("OLLAMA_SMALL_MODEL", "tinyllama")
+# Durée pendant laquelle Ollama garde le modèle (et son cache KV) chargé après un appel
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Latence moyenne (s) au-delà de laquelle le grand modèle est délesté vers le petit
+LATENCY_SLO_SECONDS = float(os.environ.get("OLLAMA_LATENCY_SLO", "8"))
+SLO_COOLDOWN_SECONDS = 30
+HEALTH_INTERVAL_SECONDS = 10
+# Questions de cette longueur (en mots) ou moins: petit modèle
+SHORT_PROMPT_WORDS = 12
+EWMA_ALPHA = 0.3
+# Connexion (s) à une instance, puis attente maximale (s) entre deux octets de la réponse:
+# sans réponse dans ces délais, l'instance est marquée en panne et l'instance suivante essayée
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "3"))
+OLLAMA_READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", "120"))
+
+# Session HTTP partagée: les connexions vers Ollama sont réutilisées d'un appel à l'autre
+_http = requests.Session()
+
+
+class OllamaError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"Erreur Ollama: {status_code}")
+        self.status_code = status_code
+
+
+class OllamaUnavailable(Exception):
+    """Aucune instance ni aucun modèle n'a pu répondre."""
+
+
+class Endpoint:
+    """Une instance Ollama, son état de santé et sa charge courante."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.healthy = True
+        # Modèles présents sur l'instance (None tant qu'aucun contrôle n'a eu lieu)
+        self.models: Optional[Set[str]] = None
+        self.in_flight = 0
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or model in self.models or f"{model}:latest" in self.models
+
+
+class OllamaRouter:
+    """Choix du modèle (petit/grand) et de l'instance la moins chargée."""
+
+    def __init__(self, hosts: List[str], large: str, small: str):
+        self.endpoints = [Endpoint(host) for host in hosts]
+        self.large = large
+        self.small = small
+        self._lock = threading.Lock()
+        self._latency: Dict[str, float] = {}
+        self._degraded_until = 0.0
+        self._health_thread: Optional[threading.Thread] = None
+
+    def pick_model(self, question: str, simple: bool = False, current: Optional[str] = None) -> str:
+        """Petit modèle pour les tâches simples, les questions courtes ou si le grand dépasse son SLO.
+
+        `current` est le modèle du contexte Ollama encore valide de la session: il est gardé
+        (sauf délestage) pour ne pas perdre ce contexte quand la longueur des questions varie.
+        """
+        if simple or time.monotonic() < self._degraded_until:
+            return self.small
+        if current in (self.small, self.large):
+            return current
+        if len(question.split()) <= SHORT_PROMPT_WORDS:
+            return self.small
+        return self.large
+
+    def fallback_chain(self, model: str) -> List[str]:
+        return [model] + [m for m in (self.small, self.large) if m != model]
+
+    def ranked(self, model: str) -> List[Endpoint]:
+        """Instances servant le modèle: saines d'abord, puis par nombre de requêtes en cours."""
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.serves(model)]
+            return sorted(candidates, key=lambda e: (not e.healthy, e.in_flight))
+
+    def begin(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.in_flight += 1
+
+    def end(self, endpoint: Endpoint, model: str, elapsed: float, error: Optional[Exception]):
+        with self._lock:
+            endpoint.in_flight -= 1
+            if error is None:
+                previous = self._latency.get(model, elapsed)
+                self._latency[model] = (1 - EWMA_ALPHA) * previous + EWMA_ALPHA * elapsed
+                if model == self.large and self._latency[model] > LATENCY_SLO_SECONDS:
+                    self._degraded_until = time.monotonic() + SLO_COOLDOWN_SECONDS
+                    # Repart d'une mesure neutre après la période de délestage
+                    self._latency[model] = LATENCY_SLO_SECONDS
+            elif not isinstance(error, OllamaError) or error.status_code >= 500:
+                endpoint.healthy = False
+
+    def check_health(self):
+        for endpoint in self.endpoints:
+            try:
+                response = _http.get(f"{endpoint.host}/api/tags", timeout=2)
+                response.raise_for_status()
+                models = {m["name"] for m in response.json().get("models", [])}
+                healthy = True
+            except (requests.RequestException, ValueError):
+                models, healthy = endpoint.models, False
+            with self._lock:
+                endpoint.healthy = healthy
+                endpoint.models = models
+
+    def start_health_checks(self):
+        """Lance le contrôle périodique des instances (une seule fois par processus)."""
+        if self._health_thread is not None:
+            return
+
+        def loop():
+            while True:
+                self.check_health()
+                time.sleep(HEALTH_INTERVAL_SECONDS)
+
+        self._health_thread = threading.Thread(target=loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "degraded": time.monotonic() < self._degraded_until,
+                "latency_s": {model: round(value, 3) for model, value in self._latency.items()},
+                "endpoints": [
+                    {"host": e.host, "healthy": e.healthy, "in_flight": e.in_flight,
+                     "models": sorted(e.models) if e.models is not None else None}
+                    for e in self.endpoints
+                ],
+            }
+
+
+router = OllamaRouter(OLLAMA_HOSTS, OLLAMA_MODEL, OLLAMA_SMALL_MODEL)
+
+
+def _payload(prompt: str, system: Optional[str], context: Optional[List[int]],
+             model: str, keep_alive: str, stream: bool) -> dict:
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": keep_alive,
+    }
+    if system:
+        payload["system"] = system
+    if context:
+        payload["context"] = context
+    return payload
+
+
+def _attempts(model: str, context: Optional[List[int]]) -> Iterator[Tuple[str, Optional[List[int]], Endpoint]]:
+    """Essais successifs: chaque instance pour le modèle demandé, puis l'autre modèle.
+
+    Le contexte Ollama est propre à un modèle: il n'est pas transmis au modèle de secours.
+    """
+    for candidate in router.fallback_chain(model):
+        for endpoint in router.ranked(candidate):
+            yield candidate, (context if candidate == model else None), endpoint
+
+
+def generate(
+    prompt: str,
+    system: Optional[str] = None,
+    context: Optional[List[int]] = None,
+    model: Optional[str] = None,
+    keep_alive: str = OLLAMA_KEEP_ALIVE,
+) -> dict:
+    """Appelle /api/generate en mode non streaming et retourne le JSON d'Ollama.
+
+    Si `context` est fourni (tokens renvoyés par l'appel précédent), Ollama reprend
+    la conversation à partir de ces tokens et n'évalue que le nouveau prompt. Le champ
+    `model` de la réponse indique le modèle qui a effectivement répondu.
+    """
+    model = model or router.pick_model(prompt)
+    last_error: Optional[Exception] = None
+    for candidate, ctx, endpoint in _attempts(model, context):
+        payload = _payload(prompt, system, ctx, candidate, keep_alive, stream=False)
+        router.begin(endpoint)
+        started, error = time.monotonic(), None
+        try:
+            response = _http.post(f"{endpoint.host}/api/generate", json=payload,
+                                  timeout=(OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT))
+            annotate(model=candidate, ollama_host=endpoint.host, ollama_status=response.status_code)
+            if response.status_code != 200:
+                print(f"⚠️ Ollama status: {response.status_code} ({candidate} @ {endpoint.host})")
+                raise OllamaError(response.status_code)
+            result = response.json()
+            result["model"] = candidate
+            return result
+        except (requests.RequestException, OllamaError) as e:
+            error = last_error = e
+        finally:
+            router.end(endpoint, candidate, time.monotonic() - started, error)
+    raise OllamaUnavailable(f"Ollama indisponible: {last_error}")
+
+
+def preload(model: str, keep_alive: str = OLLAMA_KEEP_ALIVE, timeout: float = 300) -> List[str]:
+    """Charge le modèle sur chaque instance saine (prompt vide) et le garde `keep_alive`.
+
+    Retourne les instances où le modèle est prêt.
+    """
+    loaded = []
+    for endpoint in router.ranked(model):
+        if not endpoint.healthy:
+            continue
+        try:
+            response = _http.post(f"{endpoint.host}/api/generate",
+                                  json={"model": model, "keep_alive": keep_alive}, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"⚠️ Préchargement de {model} @ {endpoint.host} impossible: {e}")
+            continue
+        if response.status_code == 200:
+            loaded.append(endpoint.host)
+        else:
+            print(f"⚠️ Préchargement de {model} @ {endpoint.host}: statut {response.status_code}")
+    return loaded
+
+
+def stream_generate(
+    prompt: str,
+    system: Optional[str] = None,
+    context: Optional[List[int]] = None,
+    model: Optional[str] = None,
+    keep_alive: str = OLLAMA_KEEP_ALIVE,
+) -> Iterator[dict]:
+    """Appelle /api/generate en streaming et produit chaque fragment JSON dès sa réception.
+
+    Le dernier fragment porte `done: true` et le `context` de la session. Le repli sur
+    une autre instance ou un autre modèle n'a lieu qu'avant le premier fragment.
+    """
+    model = model or router.pick_model(prompt)
+    last_error: Optional[Exception] = None
+    for candidate, ctx, endpoint in _attempts(model, context):
+        payload = _payload(prompt, system, ctx, candidate, keep_alive, stream=True)
+        router.begin(endpoint)
+        started, error, streamed = time.monotonic(), None, False
+        try:
+            with _http.post(f"{endpoint.host}/api/generate", json=payload, stream=True,
+                            timeout=(OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT)) as response:
+                annotate(model=candidate, ollama_host=endpoint.host, ollama_status=response.status_code)
+                if response.status_code != 200:
+                    print(f"⚠️ Ollama status: {response.status_code} ({candidate} @ {endpoint.host})")
+                    raise OllamaError(response.status_code)
+                for line in response.iter_lines():
+                    if line:
+                        chunk = json.loads(line)
+                        chunk["model"] = candidate
+                        streamed = True
+                        yield chunk
+            return
+        except (requests.RequestException, OllamaError) as e:
+            error = last_error = e
+            if streamed:
+                raise
+        finally:
+            router.end(endpoint, candidate, time.monotonic() - started, error)
+    raise OllamaUnavailable(f"Ollama indisponible: {last_error}")
+
+
+async def astream_generate(
+    prompt: str,
+    system: Optional[str] = None,
+    context: Optional[List[int]] = None,
+    model: Optional[str] = None,
+    max_buffered: int = 64,
+) -> AsyncIterator[dict]:
+    """Version asynchrone de stream_generate pour les WebSockets.
+
+    La lecture HTTP tourne dans un thread et remplit une file bornée: si le client lit
+    lentement, la file se remplit et le thread cesse de lire la réponse d'Ollama.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+    end = object()
+
+    def pump():
+        try:
+            for chunk in stream_generate(prompt, system, context, model):
+                if stop.is_set():
+                    break
+                asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+        except Exception as e:
+            asyncio.run_coroutine_threadsafe(queue.put(e), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(end), loop)
+
+    worker = asyncio.ensure_future(run_in_threadpool(pump))
+    try:
+        while True:
+            item = await queue.get()
+            if item is end:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Débloque le thread s'il attend de la place dans la file (client parti)
+        stop.set()
+        while not queue.empty():
+            queue.get_nowait()
+        if worker.done() and not worker.cancelled():
+            worker.exception()
@@ -0,0 +1,221 @@
+"""Simulateur Ollama local pour les tests de charge et de latence.
+
+Implémente /api/generate (streaming et non streaming) et /api/tags avec des délais
+configurables: chargement du modèle, évaluation du prompt, temps avant le premier
+token, débit de génération, taux d'erreur et nombre de requêtes traitées en parallèle.
+Les tirages (erreurs, texte) dépendent d'une graine: deux exécutions identiques
+produisent la même séquence.
+
+    python ollama_sim.py --port 11434 --ttft 0.2 --tps 40 --parallel 2
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+WORDS = ["la", "société", "doit", "réserver", "sa", "dénomination", "auprès", "du", "RNE", "avant",
+         "l'immatriculation", "et", "déposer", "ses", "statuts", "le", "capital", "est", "libre", "SARL"]
+
+
+class Simulator:
+    """État partagé du simulateur (configuration, modèles chargés, file d'attente)."""
+
+    def __init__(self, args):
+        self.args = args
+        self.models = args.models.split(",")
+        self._rng = random.Random(args.seed)
+        self._rng_lock = threading.Lock()
+        self._slots = threading.Semaphore(args.parallel)
+        self._queue_lock = threading.Lock()
+        self._waiting = 0
+        # Modèle -> instant d'expiration du keep_alive
+        self._loaded: Dict[str, float] = {}
+        self._load_lock = threading.Lock()
+
+    def draw(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def words(self, count: int) -> List[str]:
+        with self._rng_lock:
+            return [self._rng.choice(WORDS) for _ in range(count)]
+
+    def enter(self) -> bool:
+        """Réserve une place; False si la file d'attente est pleine (503 comme Ollama)."""
+        with self._queue_lock:
+            if self._waiting >= self.args.parallel + self.args.max_queue:
+                return False
+            self._waiting += 1
+        self._slots.acquire()
+        return True
+
+    def leave(self):
+        self._slots.release()
+        with self._queue_lock:
+            self._waiting -= 1
+
+    def load(self, model: str, keep_alive) -> float:
+        """Simule le chargement du modèle s'il n'est plus en mémoire; retourne la durée."""
+        now = time.monotonic()
+        with self._load_lock:
+            loaded = self._loaded.get(model, 0) > now
+            self._loaded[model] = now + _seconds(keep_alive, self.args.keep_alive)
+        if loaded:
+            return 0.0
+        time.sleep(self.args.load_time)
+        return self.args.load_time
+
+
+def _seconds(keep_alive, default: float) -> float:
+    if keep_alive is None:
+        return default
+    if isinstance(keep_alive, (int, float)):
+        return float(keep_alive)
+    units = {"s": 1, "m": 60, "h": 3600}
+    if keep_alive and keep_alive[-1] in units:
+        return float(keep_alive[:-1]) * units[keep_alive[-1]]
+    return float(keep_alive)
+
+
+def make_handler(sim: Simulator):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            if not sim.args.quiet:
+                super().log_message(format, *args)
+
+        def _json(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._json(200, {"models": [{"name": m, "model": m} for m in sim.models]})
+            elif self.path in ("/", "/api/version"):
+                self._json(200, {"version": "simulator"})
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._json(404, {"error": "not found"})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = request.get("model", "")
+            if model not in sim.models and f"{model}:latest" not in sim.models:
+                self._json(404, {"error": f"model '{model}' not found"})
+                return
+            if sim.draw() < sim.args.error_rate:
+                self._json(500, {"error": "simulated failure"})
+                return
+            if not sim.enter():
+                self._json(503, {"error": "server busy, please try again"})
+                return
+            try:
+                self._generate(request, model)
+            finally:
+                sim.leave()
+
+        def _generate(self, request: dict, model: str):
+            started = time.monotonic()
+            load_duration = sim.load(model, request.get("keep_alive"))
+            if not request.get("prompt"):
+                # Requête de préchargement (prompt vide): Ollama charge le modèle et répond aussitôt
+                self._json(200, {"model": model, "response": "", "done": True, "done_reason": "load"})
+                return
+
+            # Évaluation du prompt: seul le texte nouveau compte, le contexte est déjà en cache
+            context = list(request.get("context") or [])
+            prompt_tokens = len((request.get("system") or "").split()) + len(request["prompt"].split())
+            prompt_eval = prompt_tokens / sim.args.prompt_tps
+            time.sleep(sim.args.ttft + prompt_eval)
+
+            words = sim.words(sim.args.tokens)
+            stream = request.get("stream", True)
+            if stream:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+            for i, word in enumerate(words):
+                if i:
+                    time.sleep(1.0 / sim.args.tps)
+                if stream:
+                    self._chunk({"model": model, "created_at": _now(), "response": word + " ", "done": False})
+
+            total = time.monotonic() - started
+            final = {
+                "model": model,
+                "created_at": _now(),
+                "response": "" if stream else " ".join(words),
+                "done": True,
+                "done_reason": "stop",
+                "context": context + list(range(prompt_tokens + len(words))),
+                "total_duration": int(total * 1e9),
+                "load_duration": int(load_duration * 1e9),
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prompt_eval * 1e9),
+                "eval_count": len(words),
+                "eval_duration": int(max(len(words) - 1, 0) / sim.args.tps * 1e9),
+            }
+            if stream:
+                self._chunk(final)
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                self._json(200, final)
+
+        def _chunk(self, body: dict):
+            data = json.dumps(body).encode("utf-8") + b"\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulateur de l'API Ollama /api/generate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", default="llama2:7b,tinyllama", help="modèles annoncés, séparés par des virgules")
+    parser.add_argument("--ttft", type=float, default=0.2, help="délai fixe avant le premier token (s)")
+    parser.add_argument("--prompt-tps", type=float, default=500.0, help="vitesse d'évaluation du prompt (tokens/s)")
+    parser.add_argument("--tps", type=float, default=30.0, help="débit de génération (tokens/s)")
+    parser.add_argument("--tokens", type=int, default=40, help="tokens générés par réponse")
+    parser.add_argument("--load-time", type=float, default=2.0, help="durée de chargement d'un modèle froid (s)")
+    parser.add_argument("--keep-alive", type=float, default=300.0, help="keep_alive par défaut (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proportion de réponses 500")
+    parser.add_argument("--parallel", type=int, default=1, help="requêtes traitées simultanément")
+    parser.add_argument("--max-queue", type=int, default=32, help="requêtes en attente avant 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args(argv)
+
+
+def serve(args) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(Simulator(args)))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = serve(args)
+    print(f"🤖 Simulateur Ollama sur http://{args.host}:{args.port} ({args.models})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Jetons regagnés par seconde et capacité du seau (rafale maximale), par clé
+RATE_LIMIT_RATE = float(os.environ.get("RATE_LIMIT_RATE", "1.0"))
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", "20"))
+# Fichier SQLite partagé entre workers; sans lui, compteurs propres à chaque processus
+RATE_LIMIT_DB = os.environ.get("RATE_LIMIT_DB")
+# Une clé inactive depuis ce délai (s) est supprimée (son seau serait de toute façon plein)
+IDLE_TTL_SECONDS = 600
+SWEEP_INTERVAL_SECONDS = 60
+# Attente maximale du verrou SQLite: au-delà, la requête passe sans être comptée
+RATE_LIMIT_DB_TIMEOUT = float(os.environ.get("RATE_LIMIT_DB_TIMEOUT", "0.2"))
+
+# Coût en jetons selon le travail déclenché
+COSTS = {
+    "request": 1.0,       # vérification de nom, réponse depuis le registre
+    "suggestions": 3.0,   # suggestions avec appel LLM
+    "llm": 5.0,           # génération complète par le LLM
+}
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Trop de requêtes, réessayez dans {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class TokenBucketLimiter:
+    """Seaux à jetons en mémoire: deux flottants par clé, mise à jour en O(1)."""
+
+    # consume() ne fait pas d'E/S: appelable directement depuis la boucle asyncio
+    blocking = False
+
+    def __init__(self, rate: float = RATE_LIMIT_RATE, capacity: float = RATE_LIMIT_BURST,
+                 idle_ttl: float = IDLE_TTL_SECONDS):
+        self.rate = rate
+        self.capacity = capacity
+        self.idle_ttl = idle_ttl
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def consume(self, keys: List[str], cost: float) -> Tuple[bool, float]:
+        """Débite `cost` jetons sur toutes les clés, ou aucune; retourne (accepté, attente en s)."""
+        if not keys:
+            return True, 0.0
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key in keys:
+                bucket = self._buckets.get(key)
+                tokens = self.capacity if bucket is None else _refill(bucket[0], bucket[1], now, self.rate, self.capacity)
+                levels.append(tokens)
+            missing = max(cost - tokens for tokens in levels)
+            if missing > 0:
+                return False, missing / self.rate
+            for key, tokens in zip(keys, levels):
+                self._buckets[key] = [tokens - cost, now]
+            if now - self._last_sweep > SWEEP_INTERVAL_SECONDS:
+                self._sweep(now)
+        return True, 0.0
+
+    def _sweep(self, now: float):
+        expired = [key for key, (_, updated) in self._buckets.items() if now - updated > self.idle_ttl]
+        for key in expired:
+            del self._buckets[key]
+        self._last_sweep = now
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SqliteTokenBucketLimiter:
+    """Même algorithme, compteurs partagés par tous les workers via un fichier SQLite."""
+
+    # consume() peut attendre le verrou d'un autre worker: à exécuter hors de la boucle asyncio
+    blocking = True
+
+    def __init__(self, path: str, rate: float = RATE_LIMIT_RATE, capacity: float = RATE_LIMIT_BURST,
+                 idle_ttl: float = IDLE_TTL_SECONDS, timeout: float = RATE_LIMIT_DB_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.rate = rate
+        self.capacity = capacity
+        self.idle_ttl = idle_ttl
+        self._local = threading.local()
+        self._last_sweep = time.time()
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            # Compteurs non critiques: pas de fsync à chaque requête
+            db.execute("PRAGMA synchronous=OFF")
+            self._local.db = db
+        return db
+
+    def consume(self, keys: List[str], cost: float) -> Tuple[bool, float]:
+        if not keys:
+            return True, 0.0
+        # Horloge murale: partagée entre processus, contrairement à monotonic()
+        now = time.time()
+        db = self._connection()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            # Base verrouillée trop longtemps: mieux vaut laisser passer que bloquer la requête
+            print(f"⚠️ Limiteur SQLite indisponible ({e}), requête non comptée")
+            return True, 0.0
+        try:
+            placeholders = ",".join("?" * len(keys))
+            rows = dict((key, (tokens, updated)) for key, tokens, updated in db.execute(
+                f"SELECT key, tokens, updated FROM buckets WHERE key IN ({placeholders})", keys))
+            levels = [
+                _refill(*rows[key], now, self.rate, self.capacity) if key in rows else self.capacity
+                for key in keys
+            ]
+            missing = max(cost - tokens for tokens in levels)
+            if missing > 0:
+                db.execute("COMMIT")
+                return False, missing / self.rate
+            db.executemany(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                [(key, tokens - cost, now) for key, tokens in zip(keys, levels)])
+            if now - self._last_sweep > SWEEP_INTERVAL_SECONDS:
+                db.execute("DELETE FROM buckets WHERE updated < ?", (now - self.idle_ttl,))
+                self._last_sweep = now
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return True, 0.0
+
+
+def create_limiter(db_path: Optional[str] = RATE_LIMIT_DB):
+    return SqliteTokenBucketLimiter(db_path) if db_path else TokenBucketLimiter()
+
+
+def client_keys(session_id: str, client_ip: Optional[str]) -> List[str]:
+    # La session "default" est partagée par tous les clients qui n'en fournissent pas
+    keys = [f"session:{session_id}"] if session_id and session_id != "default" else []
+    if client_ip:
+        keys.append(f"ip:{client_ip}")
+    return keys
+
+
+def charge(limiter, keys: List[str], kind: str):
+    """Débite le coût du travail `kind`, ou lève RateLimited."""
+    allowed, retry_after = limiter.consume(keys, COSTS[kind])
+    if not allowed:
+        raise RateLimited(retry_after)
@@ -0,0 +1,295 @@
+import bisect
+import csv
+import heapq
+import os
+import time
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Iterator, List, Optional, Tuple
+
+# Chemin du registre (Excel, CSV ou Parquet), surchargeable par variable d'environnement
+REGISTRY_PATH = os.environ.get("RNE_REGISTRY_PATH", r'C:\Users\DeLL\OneDrive\Desktop\cc.xlsx')
+CHUNK_SIZE = int(os.environ.get("RNE_REGISTRY_CHUNK_SIZE", "50000"))
+
+# Une ligne normalisée du registre: (nom_fr, nom_ar, type)
+Row = Tuple[str, str, str]
+
+COLUMNS = ("NOM_FR", "NOM_AR", "TYPE")
+DEFAULT_TYPE = "SARL"
+
+
+def normalize_row(nom_fr, nom_ar, type_) -> Optional[Row]:
+    """Normalise une ligne brute (même règles que l'ancien chargement pandas)."""
+    nom_fr = str(nom_fr).lower().strip() if nom_fr is not None else ""
+    nom_ar = str(nom_ar).strip() if nom_ar is not None else ""
+    if not nom_fr and not nom_ar:
+        return None
+    type_ = str(type_).strip() if type_ else DEFAULT_TYPE
+    return nom_fr, nom_ar, type_
+
+
+def _check_columns(found) -> None:
+    # Sans colonne de nom, toutes les lignes seraient ignorées et tout nom paraîtrait disponible
+    if "NOM_FR" not in found and "NOM_AR" not in found:
+        raise ValueError(f"Registre sans colonne NOM_FR ni NOM_AR (colonnes: {', '.join(map(str, found)) or 'aucune'})")
+
+
+def _column_positions(header) -> List[Optional[int]]:
+    header = [str(h).strip().upper() if h is not None else "" for h in header]
+    _check_columns(header)
+    return [header.index(col) if col in header else None for col in COLUMNS]
+
+
+def _chunked(rows, positions, chunk_size: int) -> Iterator[List[Row]]:
+    chunk: List[Row] = []
+    for raw in rows:
+        values = [raw[p] if p is not None and p < len(raw) else None for p in positions]
+        row = normalize_row(*values)
+        if row is None:
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_excel(path: str, chunk_size: int) -> Iterator[List[Row]]:
+    # Mode read_only: openpyxl lit la feuille ligne par ligne sans la charger entièrement
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        positions = _column_positions(next(rows, ()))
+        yield from _chunked(rows, positions, chunk_size)
+    finally:
+        workbook.close()
+
+
+def _iter_csv(path: str, chunk_size: int) -> Iterator[List[Row]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = csv.reader(f)
+        positions = _column_positions(next(rows, []))
+        yield from _chunked(rows, positions, chunk_size)
+
+
+def _iter_parquet(path: str, chunk_size: int) -> Iterator[List[Row]]:
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    _check_columns(parquet.schema_arrow.names)
+    columns = [col for col in COLUMNS if col in parquet.schema_arrow.names]
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+        data = batch.to_pydict()
+        empty = [None] * batch.num_rows
+        values = zip(*(data.get(col, empty) for col in COLUMNS))
+        yield [row for row in (normalize_row(*v) for v in values) if row is not None]
+
+
+def iter_registry_chunks(path: str = REGISTRY_PATH, chunk_size: int = CHUNK_SIZE) -> Iterator[List[Row]]:
+    """Lit le registre par blocs de lignes normalisées, selon l'extension du fichier."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return _iter_excel(path, chunk_size)
+    if ext == ".csv":
+        return _iter_csv(path, chunk_size)
+    if ext in (".parquet", ".pq"):
+        return _iter_parquet(path, chunk_size)
+    raise ValueError(f"Format de registre non supporté: {ext}")
+
+
+def prefix_key(name: str) -> str:
+    """Clé de recherche par préfixe: minuscules, sans accents ni signes diacritiques, espaces réduits."""
+    text = unicodedata.normalize("NFKD", name.lower())
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).split())
+
+
+# Modèles de suggestions par secteur d'activité
+CONCEPT_TEMPLATES = {
+    "technologie": ["{} technologies", "{} solutions", "{} digital", "{} labs", "{} innovations"],
+    "restauration": ["le {}", "{} cuisine", "{} gourmet", "{} bistro", "{} delice"],
+    "commerce": ["{} shop", "boutique {}", "{} store", "{} market", "{} outlet"],
+    "construction": ["{} construction", "{} bâtiment", "{} travaux", "{} immobilier", "{} architecture"],
+    "santé": ["{} santé", "{} médical", "{} care", "{} pharma", "{} clinique"],
+    "éducation": ["{} éducation", "{} academy", "{} learning", "{} institute", "{} campus"],
+    "consulting": ["{} consulting", "{} conseil", "{} partners", "{} solutions", "{} advisory"],
+    "agriculture": ["{} ferme", "{} agriculture", "{} nature", "{} bio", "ferme {}"],
+    "général": ["{} group", "{} services", "{} tunisie", "{} international", "{} excellence"],
+}
+GENERIC_TEMPLATES = ["new {}", "global {}", "{} premium", "{} pro", "elite {}", "{} excellence", "{} vision"]
+
+
+def template_candidates(name: str, concept: str) -> List[str]:
+    base_name = name.strip().lower()
+    templates = CONCEPT_TEMPLATES.get(concept, CONCEPT_TEMPLATES["général"]) + GENERIC_TEMPLATES
+    return [template.format(base_name) for template in templates]
+
+
+class RegistryIndex:
+    """Index en mémoire des noms déjà enregistrés."""
+
+    def __init__(self):
+        self.names_fr: List[str] = []
+        self.names_ar: List[str] = []
+        self.types: List[str] = []
+        # Noms normalisés (FR en minuscules, AR en minuscules) pour la vérification exacte
+        self.exact = set()
+        # Index des préfixes: clés triées et (nom, type) correspondants, reconstruit après ajout
+        self._prefix: Optional[Tuple[List[str], List[Tuple[str, str]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def add_rows(self, rows: List[Row]):
+        """Ajoute un bloc de lignes normalisées à l'index."""
+        for nom_fr, nom_ar, type_ in rows:
+            self.names_fr.append(nom_fr)
+            self.names_ar.append(nom_ar)
+            self.types.append(type_)
+            if nom_fr:
+                self.exact.add(nom_fr)
+            if nom_ar:
+                self.exact.add(nom_ar.lower())
+        self._prefix = None
+
+    def is_reserved(self, name: str, threshold: float = 0.85) -> bool:
+        """Vrai si le nom existe déjà ou ressemble trop à un nom enregistré."""
+        name_lower = name.lower().strip()
+        if not name_lower:
+            return False
+        if name_lower in self.exact:
+            return True
+        return not self.unreserved([name_lower], threshold)
+
+    def build_prefix_index(self) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """Trie une fois les noms FR et AR normalisés pour la recherche par préfixe (bisect)."""
+        entries = {}
+        for names in (self.names_fr, self.names_ar):
+            for name, type_ in zip(names, self.types):
+                key = prefix_key(name) if name else ""
+                if key and key not in entries:
+                    entries[key] = (name, type_)
+        keys = sorted(entries)
+        self._prefix = (keys, [entries[key] for key in keys])
+        return self._prefix
+
+    def autocomplete(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Noms enregistrés commençant par `query` (nom, type), dans l'ordre alphabétique."""
+        prefix = prefix_key(query)
+        if not prefix:
+            return []
+        keys, entries = self._prefix or self.build_prefix_index()
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\U0010ffff", start, min(len(keys), start + limit))
+        return entries[start:end]
+
+    def closest_scores(self, candidates: List[str]) -> List[float]:
+        """Similarité maximale de chaque candidat avec le registre, en un seul parcours.
+
+        Chaque nom enregistré est préparé une fois (set_seq2) puis comparé à tous les
+        candidats; les bornes real_quick_ratio/quick_ratio évitent le calcul complet
+        quand il ne peut pas améliorer le meilleur score connu.
+        """
+        candidates = [c.lower().strip() for c in candidates]
+        best = [1.0 if c in self.exact else 0.0 for c in candidates]
+        pending = [i for i, score in enumerate(best) if score < 1.0]
+        if not pending:
+            return best
+        matcher = SequenceMatcher(None)
+        for existing_name in self._all_names():
+            matcher.set_seq2(existing_name)
+            for i in pending:
+                matcher.set_seq1(candidates[i])
+                if (matcher.real_quick_ratio() > best[i] and matcher.quick_ratio() > best[i]):
+                    best[i] = max(best[i], matcher.ratio())
+        return best
+
+    def unreserved(self, candidates: List[str], threshold: float = 0.85) -> List[str]:
+        """Candidats sans aucun nom enregistré au-delà du seuil (sans calculer les scores exacts).
+
+        Un candidat est écarté dès son premier conflit et les comparaisons dont les
+        bornes restent sous le seuil sont sautées: bien plus rapide que closest_scores
+        quand seul le verdict compte.
+        """
+        unique = list(dict.fromkeys(c.lower().strip() for c in candidates if c.strip()))
+        pending = [c for c in unique if c not in self.exact]
+        matcher = SequenceMatcher(None)
+        for existing_name in self._all_names():
+            if not pending:
+                break
+            matcher.set_seq2(existing_name)
+            conflicts = []
+            for candidate in pending:
+                matcher.set_seq1(candidate)
+                if (matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold
+                        and matcher.ratio() >= threshold):
+                    conflicts.append(candidate)
+            if conflicts:
+                pending = [c for c in pending if c not in conflicts]
+        return pending
+
+    def find_conflicts(self, names: List[str], threshold: float = 0.85,
+                       limit: int = 3) -> List[List[Tuple[str, float]]]:
+        """Pour chaque nom, les `limit` noms enregistrés les plus proches au-delà du seuil.
+
+        Un seul parcours du registre pour tout le lot, avec les mêmes bornes que
+        closest_scores; une liste vide signifie que le nom est disponible.
+        """
+        names = [n.lower().strip() for n in names]
+        found: List[List[Tuple[float, str]]] = [[] for _ in names]
+        matcher = SequenceMatcher(None)
+        for existing_name in self._all_names():
+            matcher.set_seq2(existing_name)
+            for i, name in enumerate(names):
+                # Seuil courant: le pire des `limit` conflits gardés, sinon le seuil demandé
+                floor = found[i][0][0] if len(found[i]) >= limit else threshold
+                matcher.set_seq1(name)
+                if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+                    continue
+                score = matcher.ratio()
+                if score < floor:
+                    continue
+                if len(found[i]) < limit:
+                    heapq.heappush(found[i], (score, existing_name))
+                else:
+                    heapq.heappushpop(found[i], (score, existing_name))
+        return [[(n, score) for score, n in sorted(conflicts, reverse=True)] for conflicts in found]
+
+    def _all_names(self) -> Iterator[str]:
+        yield from self.names_fr
+        for existing_name in self.names_ar:
+            yield existing_name.lower()
+
+    def available(self, candidates: List[str], threshold: float = 0.85) -> List[Tuple[str, float]]:
+        """Filtre en lot les candidats disponibles et retourne (nom, similarité max)."""
+        unique = list(dict.fromkeys(c.lower().strip() for c in candidates if c.strip()))
+        scores = self.closest_scores(unique)
+        return [(c, score) for c, score in zip(unique, scores) if score < threshold]
+
+    def suggest(self, name: str, concept: str = "général", count: int = 3) -> List[str]:
+        """Propose des variantes disponibles du nom, d'abord selon le secteur puis génériques."""
+        return self.suggest_many([(name, concept)], count)[0]
+
+    def suggest_many(self, requests: List[Tuple[str, str]], count: int = 3) -> List[List[str]]:
+        """suggest() pour un lot de (nom, secteur), avec un seul parcours du registre."""
+        pools = [template_candidates(name, concept) for name, concept in requests]
+        free = set(self.unreserved([c for pool in pools for c in pool]))
+        return [[c for c in dict.fromkeys(pool) if c in free][:count] for pool in pools]
+
+
+def load_registry(path: str = REGISTRY_PATH, chunk_size: int = CHUNK_SIZE) -> RegistryIndex:
+    """Charge le registre en flux dans un index, avec suivi de progression."""
+    index = RegistryIndex()
+    start = time.perf_counter()
+    for chunk in iter_registry_chunks(path, chunk_size):
+        index.add_rows(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"📦 {len(index)} lignes indexées ({len(index) / max(elapsed, 1e-9):.0f} lignes/s)")
+    if not len(index):
+        raise ValueError(f"Registre vide: aucun nom lu dans {path}")
+    index.build_prefix_index()
+    elapsed = time.perf_counter() - start
+    print(f"📊 Registre: {len(index)} noms en {elapsed:.2f}s ({len(index) / max(elapsed, 1e-9):.0f} lignes/s)")
+    return index
@@ -0,0 +1,136 @@
+import json
+import os
+import re
+import sys
+import unicodedata
+import zipfile
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge")
+KNOWLEDGE_PATH = os.environ.get("RNE_KNOWLEDGE_PATH", os.path.join(KNOWLEDGE_DIR, "rne_procedures.jsonl"))
+INDEX_PATH = os.environ.get("RNE_KNOWLEDGE_INDEX", os.path.join(KNOWLEDGE_DIR, "rne_index.npz"))
+# Dimension des vecteurs (hachage des mots et n-grammes de caractères)
+DIM = 2048
+NGRAM = 4
+# En dessous de ce score cosinus, un passage n'est pas jugé pertinent
+MIN_SCORE = 0.08
+
+STOPWORDS = {
+    "les", "des", "une", "est", "que", "qui", "pour", "dans", "par", "sur", "avec", "son", "ses",
+    "aux", "leur", "leurs", "pas", "plus", "elle", "ils", "sont", "être", "cette", "ces", "comment",
+    "quel", "quelle", "quels", "quelles", "faut", "peut", "mon", "nous", "vous", "the", "and",
+}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _features(text: str) -> Dict[int, float]:
+    """Mots (poids 1) et n-grammes de caractères (poids 0.5), hachés dans DIM cases."""
+    counts: Dict[int, float] = {}
+    for word in re.findall(r"\w+", _normalize(text)):
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        slot = zlib.crc32(word.encode("utf-8")) % DIM
+        counts[slot] = counts.get(slot, 0.0) + 1.0
+        padded = f"<{word}>"
+        for i in range(len(padded) - NGRAM + 1):
+            slot = zlib.crc32(padded[i:i + NGRAM].encode("utf-8")) % DIM
+            counts[slot] = counts.get(slot, 0.0) + 0.5
+    return counts
+
+
+def _embed(text: str, idf: np.ndarray) -> np.ndarray:
+    vector = np.zeros(DIM, dtype=np.float32)
+    for slot, count in _features(text).items():
+        vector[slot] = (1.0 + np.log(count)) * idf[slot]
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def load_passages(path: str = KNOWLEDGE_PATH) -> List[Dict[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_index(knowledge_path: str = KNOWLEDGE_PATH, index_path: str = INDEX_PATH) -> "KnowledgeIndex":
+    """Vectorise la base de connaissances et écrit l'index sur disque."""
+    passages = load_passages(knowledge_path)
+    documents = [f"{p['title']}. {p['text']}" for p in passages]
+    df = np.zeros(DIM, dtype=np.float32)
+    for document in documents:
+        df[list(_features(document))] += 1
+    idf = np.log((1 + len(documents)) / (1 + df)).astype(np.float32) + 1.0
+    vectors = np.stack([_embed(document, idf) for document in documents]) if documents else np.zeros((0, DIM), np.float32)
+    save_index(index_path, vectors, idf, [p["id"] for p in passages])
+    return KnowledgeIndex(passages, vectors, idf)
+
+
+def save_index(index_path: str, vectors: np.ndarray, idf: np.ndarray, ids: List[str]):
+    """Écrit l'index dans un fichier temporaire puis le met en place d'un coup (os.replace):
+    un autre worker qui démarre ne lit jamais un npz à moitié écrit."""
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, vectors=vectors, idf=idf, ids=np.array(ids))
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        # L'index reste utilisable en mémoire; il sera reconstruit au prochain démarrage
+        print(f"⚠️ Index de connaissances non écrit ({e})")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+class KnowledgeIndex:
+    """Passages de la base de connaissances RNE et leurs vecteurs."""
+
+    def __init__(self, passages: List[Dict[str, str]], vectors: np.ndarray, idf: np.ndarray):
+        self.passages = passages
+        self.vectors = vectors
+        self.idf = idf
+
+    def search(self, query: str, k: int = 2, min_score: float = MIN_SCORE) -> List[Dict[str, str]]:
+        """Retourne les k passages les plus proches de la question (score cosinus)."""
+        if not self.passages:
+            return []
+        scores = self.vectors @ _embed(query, self.idf)
+        best = np.argsort(-scores)[:k]
+        return [dict(self.passages[i], score=float(scores[i])) for i in best if scores[i] >= min_score]
+
+
+def load_index(knowledge_path: str = KNOWLEDGE_PATH, index_path: str = INDEX_PATH) -> KnowledgeIndex:
+    """Charge l'index précalculé, ou le reconstruit s'il manque ou est plus ancien que la base."""
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(knowledge_path):
+        print("🔎 Construction de l'index de connaissances RNE")
+        return build_index(knowledge_path, index_path)
+    passages = load_passages(knowledge_path)
+    try:
+        with np.load(index_path) as data:
+            ids, vectors, idf = list(data["ids"]), data["vectors"], data["idf"]
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        print(f"⚠️ Index de connaissances illisible ({e}), reconstruction")
+        return build_index(knowledge_path, index_path)
+    if ids != [p["id"] for p in passages] or vectors.shape[1:] != (DIM,):
+        return build_index(knowledge_path, index_path)
+    return KnowledgeIndex(passages, vectors, idf)
+
+
+def format_passages(passages: List[Dict[str, str]]) -> str:
+    return "\n".join(f"- {p['title']}: {p['text']}" for p in passages)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        index = build_index()
+        print(f"✅ Index écrit: {INDEX_PATH} ({len(index.passages)} passages)")
+    else:
+        index = load_index()
+        for passage in index.search(" ".join(sys.argv[1:]) or "créer une SARL", k=3):
+            print(f"{passage['score']:.3f}  {passage['title']}")
@@ -0,0 +1,166 @@
+"""Vérification en lot de noms proposés contre le registre, hors ligne.
+
+Lit les noms en flux depuis un CSV (colonne `name` ou première colonne, colonne
+`concept` facultative) ou un JSONL ({"name", "concept"}), les traite par blocs en
+parallèle et écrit, pour chaque nom, les conflits trouvés et des suggestions:
+
+    python screen_names.py propositions.csv resultats.jsonl --workers 8
+
+Le registre est chargé une seule fois avant de créer les processus: sous Linux
+(fork) ils le partagent en copie sur écriture au lieu de le recharger.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from registry import REGISTRY_PATH, RegistryIndex, load_registry
+
+# Noms par bloc: un bloc = un parcours du registre dans un processus
+BATCH_SIZE = 256
+THRESHOLD = 0.85
+
+_registry: Optional[RegistryIndex] = None
+
+
+def read_names(path: str) -> Iterator[Tuple[str, str]]:
+    """Produit (nom, secteur) ligne par ligne, sans charger le fichier."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    yield str(item.get("name", "")).strip(), item.get("concept") or "général"
+            return
+        rows = csv.reader(f)
+        first = next(rows, [])
+        # Copie en minuscules pour reconnaître l'en-tête; sans en-tête, la première ligne est un nom tel quel
+        header = [h.strip().lower() for h in first]
+        has_header = "name" in header
+        name_col = header.index("name") if has_header else 0
+        concept_col = header.index("concept") if "concept" in header else None
+        if not has_header and first:
+            yield first[name_col].strip(), "général"
+        for row in rows:
+            if len(row) > name_col and row[name_col].strip():
+                concept = row[concept_col].strip() if concept_col is not None and len(row) > concept_col else ""
+                yield row[name_col].strip(), concept or "général"
+
+
+def batches(items: Iterator[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    batch: List[Tuple[str, str]] = []
+    for item in items:
+        if item[0]:
+            batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker(registry_path: str):
+    # Sans fork (Windows, macOS), chaque processus charge sa propre copie du registre
+    global _registry
+    if _registry is None:
+        _registry = load_registry(registry_path)
+
+
+def screen_batch(batch: List[Tuple[str, str]], threshold: float = THRESHOLD,
+                 suggestions: int = 3) -> List[Dict]:
+    """Conflits et suggestions pour un bloc de noms (exécuté dans un processus du pool)."""
+    names = [name for name, _ in batch]
+    conflicts = _registry.find_conflicts(names, threshold)
+    reserved = [(name, concept) for (name, concept), found in zip(batch, conflicts) if found]
+    suggested = dict(zip((name for name, _ in reserved), _registry.suggest_many(reserved, suggestions))) if suggestions else {}
+    return [
+        {
+            "name": name,
+            "concept": concept,
+            "reserved": bool(found),
+            "conflicts": [{"name": n, "score": round(score, 3)} for n, score in found],
+            "suggestions": suggested.get(name, []),
+        }
+        for (name, concept), found in zip(batch, conflicts)
+    ]
+
+
+class ResultWriter:
+    """Écrit les résultats en JSONL ou en CSV selon l'extension du fichier de sortie."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.csv = None
+        if path.endswith(".csv"):
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(["name", "concept", "reserved", "conflicts", "suggestions"])
+
+    def write(self, result: Dict):
+        if self.csv is None:
+            self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            return
+        self.csv.writerow([
+            result["name"],
+            result["concept"],
+            result["reserved"],
+            "; ".join(f"{c['name']} ({c['score']})" for c in result["conflicts"]),
+            "; ".join(result["suggestions"]),
+        ])
+
+    def close(self):
+        self.file.close()
+
+
+def run(args) -> Dict[str, float]:
+    global _registry
+    _registry = load_registry(args.registry)
+    # fork: les processus héritent de l'index déjà chargé
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    context = multiprocessing.get_context(method)
+
+    writer = ResultWriter(args.output)
+    total = reserved = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=_init_worker, initargs=(args.registry,)) as pool:
+        # Blocs en vol bornés: la lecture avance au rythme du calcul, l'ordre d'entrée est gardé
+        pending: deque = deque()
+
+        def drain(limit: int):
+            nonlocal total, reserved
+            while len(pending) > limit:
+                for result in pending.popleft().result():
+                    writer.write(result)
+                    total += 1
+                    reserved += result["reserved"]
+                elapsed = time.perf_counter() - started
+                print(f"📦 {total} noms vérifiés ({total / max(elapsed, 1e-9):.0f} noms/s)", file=sys.stderr)
+
+        for batch in batches(read_names(args.input), args.batch_size):
+            pending.append(pool.submit(screen_batch, batch, args.threshold, args.suggestions))
+            drain(args.workers * 2)
+        drain(0)
+    writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"📊 {total} noms en {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} noms/s), "
+          f"{reserved} en conflit, {args.workers} processus", file=sys.stderr)
+    return {"names": total, "reserved": reserved, "seconds": elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vérification en lot de noms d'entreprise")
+    parser.add_argument("input", help="noms à vérifier (.csv ou .jsonl)")
+    parser.add_argument("output", help="résultats (.jsonl ou .csv)")
+    parser.add_argument("--registry", default=REGISTRY_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--suggestions", type=int, default=3, help="suggestions par nom en conflit (0: aucune)")
+    run(parser.parse_args())
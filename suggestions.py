@@ -0,0 +1,49 @@
+import re
+from typing import List
+
+from ollama_client import generate, router
+from registry import RegistryIndex, template_candidates
+
+# Nombre de noms demandés au LLM en un seul appel
+LLM_POOL_SIZE = 30
+
+SUGGESTION_PROMPT = (
+    "Propose {count} noms d'entreprise originaux et courts pour une société tunisienne "
+    "du secteur {concept}, inspirés de '{name}'. "
+    "Un nom par ligne, sans numérotation, sans explication."
+)
+
+
+def parse_llm_names(text: str) -> List[str]:
+    """Extrait un nom par ligne de la réponse du LLM (puces, numéros et guillemets retirés)."""
+    names = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip(" \"'«»*.")
+        if 2 < len(line) <= 60:
+            names.append(line.lower())
+    return names
+
+
+def llm_candidates(name: str, concept: str, count: int = LLM_POOL_SIZE) -> List[str]:
+    try:
+        # Tâche simple: petit modèle
+        prompt = SUGGESTION_PROMPT.format(count=count, concept=concept, name=name)
+        result = generate(prompt, model=router.pick_model(prompt, simple=True))
+    except Exception as e:
+        print(f"⚠️ Suggestions LLM indisponibles: {e}")
+        return []
+    return parse_llm_names(result.get("response", ""))
+
+
+def generate_suggestions(registry: RegistryIndex, name: str, concept: str = "général",
+                         count: int = 5, use_llm: bool = True) -> List[str]:
+    """Retourne les `count` meilleurs noms disponibles, les plus éloignés du registre d'abord.
+
+    Le pool (modèles + un seul appel LLM) est filtré en un seul parcours du registre.
+    """
+    candidates = template_candidates(name, concept)
+    if use_llm:
+        candidates += llm_candidates(name, concept)
+    available = registry.available(candidates)
+    available.sort(key=lambda item: item[1])
+    return [suggestion for suggestion, _ in available[:count]]
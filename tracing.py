@@ -0,0 +1,195 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Proportion des requêtes dont la trace est écrite; les requêtes lentes le sont toujours
+TRACE_SAMPLE_RATE = float(os.environ.get("RNE_TRACE_SAMPLE_RATE", "0.1"))
+TRACE_SLOW_MS = float(os.environ.get("RNE_TRACE_SLOW_MS", "2000"))
+# Fichier JSON lines des traces (sortie d'erreur par défaut)
+TRACE_LOG_PATH = os.environ.get("RNE_TRACE_LOG")
+# Profilage à la demande (/debug/profile), désactivé par défaut
+PROFILING_ENABLED = os.environ.get("RNE_PROFILING") == "1"
+PROFILE_INTERVAL_SECONDS = 0.005
+PROFILE_MAX_DEPTH = 64
+
+_current: contextvars.ContextVar = contextvars.ContextVar("rne_trace", default=None)
+
+
+class Trace:
+    """Une requête: ses étapes (spans) et quelques attributs."""
+
+    def __init__(self, route: str, **attrs):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.route = route
+        self.attrs = attrs
+        self.spans: List[dict] = []
+        self.started = time.perf_counter()
+
+    def to_record(self, duration_ms: float) -> dict:
+        return {
+            "ts": time.time(),
+            "trace_id": self.trace_id,
+            "route": self.route,
+            "duration_ms": round(duration_ms, 2),
+            **self.attrs,
+            "spans": self.spans,
+        }
+
+
+class _AsyncQueueHandler(logging.handlers.QueueHandler):
+    # L'enregistrement part tel quel: la sérialisation JSON se fait dans le thread d'écriture
+    def prepare(self, record):
+        return record
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+logger = logging.getLogger("rne.trace")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def start_sink(path: Optional[str] = TRACE_LOG_PATH):
+    """Branche le logger sur une file: les requêtes n'attendent jamais l'écriture."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(_JsonFormatter())
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        logger.addHandler(_AsyncQueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, handler)
+        _listener.start()
+
+
+def stop_sink():
+    """Vide la file puis arrête le thread d'écriture."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        _listener = None
+
+
+atexit.register(stop_sink)
+
+
+@contextmanager
+def trace(route: str, **attrs) -> Iterator[Trace]:
+    """Trace une requête; écrite si tirée au sort, lente ou en erreur."""
+    current = Trace(route, **attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        duration_ms = (time.perf_counter() - current.started) * 1000
+        if "error" in current.attrs or duration_ms >= TRACE_SLOW_MS or random.random() < TRACE_SAMPLE_RATE:
+            start_sink()
+            logger.info(current.to_record(duration_ms))
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Dict]:
+    """Mesure une étape de la requête courante (sans effet hors d'une trace)."""
+    current = _current.get()
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        if current is not None:
+            current.spans.append({
+                "name": name,
+                "start_ms": round((started - current.started) * 1000, 2),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                **attrs,
+            })
+
+
+def annotate(**attrs):
+    """Ajoute des attributs à la trace courante (modèle, instance Ollama...)."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+class StackSampler:
+    """Échantillonne les piles de tous les threads du worker (format « folded » des flame graphs)."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Arrête l'échantillonnage et retourne les piles agrégées, une par ligne."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.folded()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            names.update((t.ident, t.name) for t in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+
+profiler = StackSampler()